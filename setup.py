@@ -42,10 +42,10 @@ setup(name='MyShell-OpenVoice',
             'langid==1.1.6',
             'torch>=2.0.0',
             'soundfile>=0.12.1',
-            'fastapi>=0.68.0',
-            'uvicorn>=0.15.0',
+            'fastapi>=0.100.0',
+            'uvicorn[standard]>=0.22.0',
             'python-multipart>=0.0.5',
-            'pydantic>=1.8.0',
+            'pydantic>=2.6.0',
             'protobuf==3.20.0',
             'onnx==1.14.0',
             'onnxruntime==1.15.0',
@@ -56,6 +56,11 @@ setup(name='MyShell-OpenVoice',
             'PySide6==6.4.2',
       ],
       extras_require={
+        "api": [
+            "gunicorn>=21.2.0; platform_system != 'Windows'",
+            "uvicorn-worker>=0.2.0; platform_system != 'Windows'",
+            "orjson>=3.9.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "black>=22.0.0",
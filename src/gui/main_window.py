@@ -1278,7 +1278,7 @@ class MainWindow(QMainWindow):
             
             # Obtenir les ports MIDI
             try:
-                ports = self.midi_manager.get_ports()
+                ports = self.midi_manager.refresh_ports()
                 for port in ports:
                     # Améliorer l'affichage pour les périphériques USB/MIDI
                     display_name = port
@@ -197,13 +197,13 @@ class MidiConfigDialog(QDialog):
                 self.mapping_table.setItem(row, 0, QTableWidgetItem(self.midi_mapping.TYPES.get(midi_type, midi_type)))
                 
                 # Canal et contrôleur
-                if ":" in identifier:
-                    channel, controller = identifier.split(":", 1)
+                if isinstance(identifier, tuple):
+                    channel, controller = identifier
                 else:
-                    channel, controller = "0", identifier
+                    channel, controller = identifier, ""
                     
-                self.mapping_table.setItem(row, 1, QTableWidgetItem(channel))
-                self.mapping_table.setItem(row, 2, QTableWidgetItem(controller))
+                self.mapping_table.setItem(row, 1, QTableWidgetItem(str(channel)))
+                self.mapping_table.setItem(row, 2, QTableWidgetItem(str(controller)))
                 
                 # Fonction
                 category, function = self.midi_mapping.parse_function(function_id)
@@ -218,7 +218,7 @@ class MidiConfigDialog(QDialog):
                 
                 # Stocker les données pour la suppression
                 self.mapping_table.item(row, 0).setData(Qt.UserRole, midi_type)
-                self.mapping_table.item(row, 1).setData(Qt.UserRole, identifier)
+                self.mapping_table.item(row, 1).setData(Qt.UserRole, self.midi_mapping.format_identifier(identifier))
                 
                 row += 1
                 
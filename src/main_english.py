@@ -38,7 +38,7 @@ except ImportError:
     from gui.models_tab import ModelsTab
 
 from gui.midi_tab import MidiTab
-from utils.midi_device_manager import midi_manager
+from utils.midi_device_manager import get_midi_manager
 from core.voice_cloning import model_manager
 
 # Logging configuration
@@ -219,8 +219,8 @@ class PreloaderThread(QObject):
                 logger.error(f"Error creating MIDI objects: {e}")
                 rtmidi_version = "Not available"
             
-            # Scan MIDI devices
-            midi_manager.scan_devices()
+            # Wait for the initial MIDI scan started in the background
+            get_midi_manager().wait_for_scan()
             
             # Here, we could preload virtual MIDI instruments
             # or other resources for MIDI processing
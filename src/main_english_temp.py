@@ -26,7 +26,7 @@ from gui.synthesis_tab_english import SynthesisTab
 from gui.recording_tab_english import RecordingTab
 from gui.models_tab_english import ModelsTab
 from gui.midi_tab import MidiTab
-from utils.midi_device_manager import midi_manager
+from utils.midi_device_manager import get_midi_manager
 from core.voice_cloning import model_manager
 
 # Logging configuration
@@ -207,8 +207,8 @@ class PreloaderThread(QObject):
                 logger.error(f"Error creating MIDI objects: {e}")
                 rtmidi_version = "Not available"
             
-            # Scan MIDI devices
-            midi_manager.scan_devices()
+            # Wait for the initial MIDI scan started in the background
+            get_midi_manager().wait_for_scan()
             
             # Here, we could preload virtual MIDI instruments
             # or other resources for MIDI processing
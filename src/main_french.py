@@ -25,7 +25,7 @@ from gui.recording_tab import RecordingTab
 from gui.synthesis_tab import SynthesisTab
 from gui.models_tab import ModelsTab
 from gui.midi_tab import MidiTab
-from utils.midi_device_manager import midi_manager
+from utils.midi_device_manager import get_midi_manager
 from core.voice_cloning import model_manager
 
 # Configuration du logging
@@ -206,8 +206,8 @@ class PreloaderThread(QObject):
                 logger.error(f"Erreur lors de la création des objets MIDI: {e}")
                 rtmidi_version = "Non disponible"
             
-            # Scanner les périphériques MIDI
-            midi_manager.scan_devices()
+            # Attendre le scan MIDI initial lancé en arrière-plan
+            get_midi_manager().wait_for_scan()
             
             # Ici, on pourrait précharger des instruments MIDI virtuels
             # ou d'autres ressources pour le traitement MIDI
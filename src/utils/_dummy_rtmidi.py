@@ -0,0 +1,47 @@
+"""
+Classes simulant rtmidi lorsque la bibliothèque n'est pas disponible.
+
+Ce module n'est importé par midi_device_manager que si rtmidi est absent
+ou incomplet, afin de ne rien charger dans le cas courant.
+"""
+
+import logging
+
+# Configuration du logger
+logger = logging.getLogger(__name__)
+
+_EMPTY_PORTS = ()
+_dummy_warning_emitted = False
+
+
+def _noop(*args, **kwargs):
+    """Opération MIDI simulée sans effet"""
+    return None
+
+
+class _DummyMidi:
+    """Base commune simulant MidiIn/MidiOut lorsque rtmidi n'est pas disponible"""
+    def __init__(self, *args, **kwargs):
+        # Un seul avertissement pour tout le processus, pas un par instance
+        global _dummy_warning_emitted
+        if not _dummy_warning_emitted:
+            _dummy_warning_emitted = True
+            logger.warning("Utilisation de ports MIDI simulés (rtmidi non disponible)")
+
+    def get_ports(self):
+        """Retourne une liste vide de ports"""
+        return _EMPTY_PORTS
+
+    open_port = staticmethod(_noop)
+    close_port = staticmethod(_noop)
+    set_callback = staticmethod(_noop)
+    cancel_callback = staticmethod(_noop)
+    send_message = staticmethod(_noop)
+
+
+class DummyMidiIn(_DummyMidi):
+    """Classe simulant MidiIn lorsque rtmidi n'est pas disponible"""
+
+
+class DummyMidiOut(_DummyMidi):
+    """Classe simulant MidiOut lorsque rtmidi n'est pas disponible"""
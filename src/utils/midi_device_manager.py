@@ -6,64 +6,18 @@ détecter les entrées/sorties disponibles et traiter les événements MIDI.
 """
 
 import logging
+import os
+import sys
+import threading
 import time
-from typing import List, Dict, Optional, Callable
+import types
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Callable, Tuple
 
 # Configuration du logger
 logger = logging.getLogger(__name__)
 
-# Classe de remplacement pour simuler rtmidi si non disponible
-class DummyMidiIn:
-    """Classe simulant MidiIn lorsque rtmidi n'est pas disponible"""
-    def __init__(self, *args, **kwargs):
-        logger.warning("Utilisation de MidiIn simulé (rtmidi non disponible)")
-    
-    def get_ports(self):
-        """Retourne une liste vide de ports"""
-        return []
-    
-    def open_port(self, *args, **kwargs):
-        """Simule l'ouverture d'un port"""
-        logger.warning("Tentative d'ouverture d'un port MIDI simulé")
-        return False
-    
-    def close_port(self):
-        """Simule la fermeture d'un port"""
-        pass
-    
-    def set_callback(self, callback):
-        """Simule la définition d'un callback"""
-        pass
-    
-    def cancel_callback(self):
-        """Simule l'annulation d'un callback"""
-        pass
-
-
-class DummyMidiOut:
-    """Classe simulant MidiOut lorsque rtmidi n'est pas disponible"""
-    def __init__(self, *args, **kwargs):
-        logger.warning("Utilisation de MidiOut simulé (rtmidi non disponible)")
-    
-    def get_ports(self):
-        """Retourne une liste vide de ports"""
-        return []
-    
-    def open_port(self, *args, **kwargs):
-        """Simule l'ouverture d'un port"""
-        logger.warning("Tentative d'ouverture d'un port MIDI simulé")
-        return False
-    
-    def close_port(self):
-        """Simule la fermeture d'un port"""
-        pass
-    
-    def send_message(self, message):
-        """Simule l'envoi d'un message"""
-        logger.debug(f"Message MIDI simulé: {message}")
-        pass
-
-
 # Tentative d'importation de rtmidi
 try:
     import rtmidi
@@ -71,6 +25,7 @@ try:
     # Vérifier que les classes MidiIn et MidiOut sont disponibles
     if not hasattr(rtmidi, 'MidiIn') or not hasattr(rtmidi, 'MidiOut'):
         logger.error("La version de rtmidi ne contient pas les classes MidiIn/MidiOut")
+        from ._dummy_rtmidi import DummyMidiIn, DummyMidiOut
         rtmidi.MidiIn = DummyMidiIn
         rtmidi.MidiOut = DummyMidiOut
         RTMIDI_AVAILABLE = False
@@ -80,43 +35,160 @@ try:
 except ImportError:
     # Créer un module rtmidi simulé
     logger.warning("Module rtmidi non disponible, utilisation de classes simulées")
-    import types
+    from ._dummy_rtmidi import DummyMidiIn, DummyMidiOut
     rtmidi = types.ModuleType('rtmidi')
     rtmidi.MidiIn = DummyMidiIn
     rtmidi.MidiOut = DummyMidiOut
     RTMIDI_AVAILABLE = False
 
 
+class _StrongRef:
+    """Référence forte exposant la même interface qu'une weakref"""
+    
+    __slots__ = ('_obj',)
+    
+    def __init__(self, obj):
+        self._obj = obj
+    
+    def __call__(self):
+        return self._obj
+
+
+def _raise_current_thread_priority(cpu: Optional[int] = None) -> bool:
+    """Passe le thread courant en priorité temps réel (au mieux selon l'OS)
+
+    Linux : SCHED_FIFO (nécessite CAP_SYS_NICE) et épinglage optionnel sur
+    un CPU. Windows : MMCSS « Pro Audio ». macOS : QoS USER_INTERACTIVE.
+    Retourne False si l'OS refuse, sans lever d'exception.
+    """
+    try:
+        if sys.platform.startswith('linux'):
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(50))
+            if cpu is not None:
+                os.sched_setaffinity(0, {cpu})
+            return True
+        if sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+            task_index = wintypes.DWORD(0)
+            handle = ctypes.windll.avrt.AvSetMmThreadCharacteristicsW("Pro Audio", ctypes.byref(task_index))
+            return bool(handle)
+        if sys.platform == 'darwin':
+            import ctypes
+            libsystem = ctypes.CDLL('/usr/lib/libSystem.dylib')
+            QOS_CLASS_USER_INTERACTIVE = 0x21
+            return libsystem.pthread_set_qos_class_self_np(QOS_CLASS_USER_INTERACTIVE, 0) == 0
+    except (AttributeError, OSError) as e:
+        logger.warning(f"Impossible d'augmenter la priorité du thread MIDI: {e}")
+    return False
+
+
+class _MidiScope:
+    """Contexte garantissant la libération immédiate d'un objet rtmidi temporaire"""
+    def __init__(self, midi_class):
+        self.obj = midi_class()
+
+    def __enter__(self):
+        return self.obj
+
+    def __exit__(self, *exc_info):
+        try:
+            self.obj.close_port()
+            # python-rtmidi expose delete() pour libérer le client du séquenceur
+            delete = getattr(self.obj, 'delete', None)
+            if delete is not None:
+                delete()
+        finally:
+            del self.obj
+        return False
+
+
+def _read_ports(midi_class) -> List[str]:
+    """Lit la liste des ports d'une classe rtmidi via un objet temporaire"""
+    with _MidiScope(midi_class) as midi_obj:
+        return list(midi_obj.get_ports())
+
+
+# Attente maximale (s) du scan initial avant de répondre sans ports
+_WARMUP_WAIT = 0.05
+
+
+def _normalize_ports(ports: List[str], previous: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Trie et dédoublonne une liste de ports, en réutilisant previous si identique"""
+    normalized = tuple(sorted(set(ports)))
+    return previous if normalized == previous else normalized
+
+
 class MidiDeviceManager:
     """Gestionnaire de périphériques MIDI"""
     
     def __init__(self):
         self.input_ports = []
         self.output_ports = []
+        self._input_ports_sorted = ()
+        self._output_ports_sorted = ()
         self.input_devices = {}
         self.output_devices = {}
         self.active_input = None
         self.active_output = None
         self.midi_callbacks = []
+        self._callbacks_tuple = ()
         self.rtmidi_available = RTMIDI_AVAILABLE
+        # Horodatage entier monotone (ns) au lieu du temps fourni par rtmidi
+        self.fast_timestamp = False
+        # Priorité temps réel demandée pour le thread de callback rtmidi
+        self._realtime_cpu = None
+        self._realtime_requested = False
+        self._realtime_threads = set()
+        
+        # Premier scan en arrière-plan : l'énumération initiale peut prendre
+        # plusieurs secondes (CoreMIDI, ALSA) et ne doit pas bloquer l'interface
+        self._warmup_done = threading.Event()
+        # Un seul scan à la fois : un appel concurrent réutilise son résultat
+        self._scan_lock = threading.Lock()
+        self._scan_result = False
         
         if not self.rtmidi_available:
             logger.warning("RTMidi non disponible, fonctionnement en mode de compatibilité limité")
+            self._warmup_done.set()
+        else:
+            threading.Thread(target=self.scan_devices, name="midi-warmup", daemon=True).start()
     
-    def scan_devices(self) -> None:
-        """Détecte les périphériques MIDI disponibles"""
+    def scan_devices(self) -> bool:
+        """Détecte les périphériques MIDI disponibles
+
+        Si un scan est déjà en cours (ex. le scan initial en arrière-plan),
+        attend sa fin et retourne son résultat au lieu d'en lancer un second.
+        """
+        if not self._scan_lock.acquire(blocking=False):
+            with self._scan_lock:
+                return self._scan_result
         try:
-            # Créer des objets pour détecter les ports
-            midi_in = rtmidi.MidiIn()
-            midi_out = rtmidi.MidiOut()
-            
-            # Récupérer les ports disponibles
-            self.input_ports = midi_in.get_ports()
-            self.output_ports = midi_out.get_ports()
+            self._scan_result = self._scan_devices()
+            return self._scan_result
+        finally:
+            self._scan_lock.release()
+            self._warmup_done.set()
+    
+    def wait_for_scan(self, timeout: Optional[float] = None) -> bool:
+        """Attend la fin du scan initial; retourne False si le délai expire"""
+        return self._warmup_done.wait(timeout)
+    
+    def _scan_devices(self) -> bool:
+        """Énumère les ports MIDI et met à jour les listes"""
+        try:
+            # Énumérer entrées et sorties en parallèle : rtmidi libère le GIL
+            # pendant l'appel bloquant au sous-système MIDI de l'OS
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                input_future = executor.submit(_read_ports, rtmidi.MidiIn)
+                output_future = executor.submit(_read_ports, rtmidi.MidiOut)
+                self.input_ports = input_future.result()
+                self.output_ports = output_future.result()
             
-            # Libérer les ressources
-            del midi_in
-            del midi_out
+            # Versions triées et dédoublonnées pour l'interface, réutilisées
+            # telles quelles si le scan n'a rien changé
+            self._input_ports_sorted = _normalize_ports(self.input_ports, self._input_ports_sorted)
+            self._output_ports_sorted = _normalize_ports(self.output_ports, self._output_ports_sorted)
             
             logger.info(f"Ports MIDI d'entrée détectés: {self.input_ports}")
             logger.info(f"Ports MIDI de sortie détectés: {self.output_ports}")
@@ -126,15 +198,25 @@ class MidiDeviceManager:
             logger.error(f"Erreur lors de la détection des périphériques MIDI: {e}")
             self.input_ports = []
             self.output_ports = []
+            self._input_ports_sorted = ()
+            self._output_ports_sorted = ()
             return False
     
-    def get_input_ports(self) -> List[str]:
-        """Retourne la liste des ports d'entrée MIDI disponibles"""
-        return self.input_ports
+    def get_input_ports(self) -> Tuple[str, ...]:
+        """Retourne les ports d'entrée MIDI disponibles, triés et sans doublons
+
+        Si le scan initial n'est pas encore terminé, attend au plus
+        _WARMUP_WAIT secondes puis retourne un tuple vide.
+        """
+        if not self._warmup_done.wait(_WARMUP_WAIT):
+            return ()
+        return self._input_ports_sorted
     
-    def get_output_ports(self) -> List[str]:
-        """Retourne la liste des ports de sortie MIDI disponibles"""
-        return self.output_ports
+    def get_output_ports(self) -> Tuple[str, ...]:
+        """Retourne les ports de sortie MIDI disponibles, triés et sans doublons"""
+        if not self._warmup_done.wait(_WARMUP_WAIT):
+            return ()
+        return self._output_ports_sorted
     
     def open_input(self, port_name: str) -> bool:
         """Ouvre un port d'entrée MIDI spécifique"""
@@ -265,31 +347,99 @@ class MidiDeviceManager:
             return False
     
     def register_callback(self, callback: Callable) -> None:
-        """Enregistre une fonction de callback pour les événements MIDI"""
-        if callback not in self.midi_callbacks:
-            self.midi_callbacks.append(callback)
+        """Enregistre une fonction de callback pour les événements MIDI
+
+        Les méthodes liées Python (ex. slot d'un widget) sont conservées par
+        référence faible : un widget détruit sans appeler unregister_callback
+        est simplement retiré de la liste. Les autres callables (fonctions,
+        lambdas, méthodes natives comme list.append) sont conservés par
+        référence forte et doivent être retirés avec unregister_callback.
+        """
+        if self._find_callback(callback) is not None:
+            return
+        if isinstance(callback, types.MethodType):
+            ref = weakref.WeakMethod(callback)
+        else:
+            ref = _StrongRef(callback)
+        self.midi_callbacks.append(ref)
+        self._callbacks_tuple = tuple(self.midi_callbacks)
     
     def unregister_callback(self, callback: Callable) -> None:
         """Supprime une fonction de callback"""
-        if callback in self.midi_callbacks:
-            self.midi_callbacks.remove(callback)
+        ref = self._find_callback(callback)
+        if ref is not None:
+            self.midi_callbacks.remove(ref)
+            self._callbacks_tuple = tuple(self.midi_callbacks)
+    
+    def _find_callback(self, callback: Callable):
+        """Retourne la référence associée à un callback, ou None"""
+        for ref in self.midi_callbacks:
+            if ref() == callback:
+                return ref
+        return None
+    
+    def _prune_callbacks(self) -> None:
+        """Retire les callbacks dont l'objet propriétaire a été détruit"""
+        self.midi_callbacks = [ref for ref in self.midi_callbacks if ref() is not None]
+        self._callbacks_tuple = tuple(self.midi_callbacks)
+    
+    def set_realtime_priority(self, cpu: Optional[int] = None) -> None:
+        """Demande une priorité temps réel pour le thread de réception MIDI
+
+        Le thread de callback rtmidi est créé par la bibliothèque C : la
+        priorité est donc appliquée par ce thread lui-même, au premier
+        message reçu. cpu permet de l'épingler sur un cœur dédié (Linux).
+        """
+        self._realtime_cpu = cpu
+        self._realtime_requested = True
+        self._realtime_threads.clear()
     
     def _handle_midi_input(self, message, timestamp):
-        """Gère les messages MIDI entrants et les transmet aux callbacks"""
+        """Gère les messages MIDI entrants et les transmet aux callbacks
+
+        Si fast_timestamp est activé, les callbacks reçoivent un horodatage
+        entier time.monotonic_ns() pris à l'entrée, suffisant pour ordonner
+        les événements sans manipuler de flottants.
+        """
+        if self._realtime_requested:
+            thread_id = threading.get_ident()
+            if thread_id not in self._realtime_threads:
+                self._realtime_threads.add(thread_id)
+                _raise_current_thread_priority(self._realtime_cpu)
+        
         midi_data = message[0]
-        logger.debug(f"Message MIDI reçu: {midi_data} à {timestamp}")
+        if self.fast_timestamp:
+            timestamp = time.monotonic_ns()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Message MIDI reçu: {midi_data} à {timestamp}")
         
-        # Transmettre le message à tous les callbacks enregistrés
-        for callback in self.midi_callbacks:
+        # Transmettre le message à tous les callbacks encore vivants
+        dead_seen = False
+        for ref in self._callbacks_tuple:
+            callback = ref()
+            if callback is None:
+                dead_seen = True
+                continue
             try:
                 callback(midi_data, timestamp)
             except Exception as e:
                 logger.error(f"Erreur dans le callback MIDI: {e}")
+        
+        if dead_seen:
+            self._prune_callbacks()
     
     def is_available(self) -> bool:
         """Vérifie si RTMIDI est disponible"""
         return self.rtmidi_available
 
 
-# Instance singleton du gestionnaire MIDI
-midi_manager = MidiDeviceManager() 
\ No newline at end of file
+# Instance singleton du gestionnaire MIDI, créée au premier accès
+_midi_manager: Optional[MidiDeviceManager] = None
+
+
+def get_midi_manager() -> MidiDeviceManager:
+    """Retourne l'instance partagée du gestionnaire MIDI (créée à la demande)"""
+    global _midi_manager
+    if _midi_manager is None:
+        _midi_manager = MidiDeviceManager()
+    return _midi_manager
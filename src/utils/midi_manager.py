@@ -1,8 +1,14 @@
+import logging
+import re
 import time
-from PySide6.QtCore import QObject, QThread, Signal
+from collections import deque
+from PySide6.QtCore import QObject, QTimer, Qt, Signal
 import sys
 import os
 
+# Configuration du logger
+logger = logging.getLogger(__name__)
+
 # Définir manuellement les constantes MIDI API pour éviter la dépendance à rtmidi.API_*
 # Ces valeurs sont standards pour RtMidi
 API_UNSPECIFIED = 0
@@ -12,6 +18,57 @@ API_LINUX_ALSA = 3
 API_MACOSX_CORE = 4
 API_RTMIDI_DUMMY = 5
 
+# Durée de validité (s) du cache de la liste des ports MIDI
+_PORTS_CACHE_TTL = 2.0
+
+# Filtrage et classification des noms de ports, compilés une seule fois
+_SYSTEM_RE = re.compile(r'wdmaud\.drv|Microsoft GS Wavetable|Microsoft MIDI Mapper')
+_CONTROLLER_RE = re.compile(r'USB|MIDI|MPK|AKAI|Roland|Novation|Korg|Arturia|Pioneer|DDJ|Ableton|Push')
+
+# Mot-clé (en majuscules) -> constructeur, testés dans l'ordre
+_VENDOR_MAP = {
+    'AKAI': 'AKAI',
+    'MPK': 'AKAI',
+    'ABLETON': 'ABLETON',
+    'PUSH': 'ABLETON',
+    'KORG': 'KORG',
+    'ROLAND': 'ROLAND',
+    'PIONEER': 'PIONEER',
+    'DDJ': 'PIONEER',
+}
+_VENDOR_ICONS = {'ABLETON': '🎛️', 'PIONEER': '🎛️'}
+
+
+def _classify_port(port):
+    """Retourne le constructeur reconnu dans un nom de port, ou None"""
+    upper = port.upper()
+    for keyword, vendor in _VENDOR_MAP.items():
+        if keyword in upper:
+            return vendor
+    return None
+
+
+# Noms et fréquences (Hz) des 128 notes MIDI, précalculés
+_NOTE_NAMES = tuple(
+    f"{('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')[i % 12]}{(i // 12) - 1}"
+    for i in range(128)
+)
+_NOTE_FREQS = tuple(440.0 * (2.0 ** ((i - 69) / 12.0)) for i in range(128))
+
+# Types de messages canal n'ayant qu'un octet de données (program change, aftertouch canal)
+_TWO_BYTE_STATUSES = frozenset((0xC0, 0xD0))
+
+# Contrôleurs jamais fusionnés : interrupteurs (sustain, portamento, sostenuto,
+# soft, legato, hold 2) et messages de mode canal, dont chaque valeur compte
+_SWITCH_CONTROLLERS = frozenset(range(64, 70)) | frozenset(range(120, 128))
+
+# Capacité du tampon de réception et taille maximale d'une tranche de vidange
+_RX_CAPACITY = 2048
+_RX_DRAIN_CHUNK = 64
+
+# Méthodes d'ouverture de port essayées dans l'ordre (voir MidiManager.open_port)
+_OPEN_STRATEGIES = ('mido', 'backend', 'rtmidi')
+
 # Import mido avec gestion d'erreur
 try:
     import mido
@@ -34,50 +91,14 @@ try:
             rtmidi.API_NUM = 6
             print("🔧 Ajout de constantes manquantes à rtmidi")
             
-        # Vérifier si MidiIn et MidiOut sont disponibles
+        # Sans MidiIn, rtmidi est inutilisable : désactiver le MIDI plutôt
+        # que d'installer des classes factices sans ports
         if not hasattr(rtmidi, 'MidiIn'):
-            # Créer une classe factice MidiIn
-            class MidiInStub:
-                def __init__(self, api=0):
-                    pass
-                def get_port_count(self):
-                    return 0
-                def get_port_name(self, port_id):
-                    return ""
-                def open_port(self, port_id):
-                    pass
-                def close_port(self):
-                    pass
-                def is_port_open(self):
-                    return False
-            
-            rtmidi.MidiIn = MidiInStub
-            print("⚠️ MidiIn non disponible, utilisation d'une classe factice")
-            
-        if not hasattr(rtmidi, 'MidiOut'):
-            # Réutiliser MidiIn pour MidiOut si nécessaire
-            if hasattr(rtmidi, 'MidiIn'):
-                rtmidi.MidiOut = rtmidi.MidiIn
-            else:
-                # Créer une classe factice MidiOut
-                class MidiOutStub:
-                    def __init__(self, api=0):
-                        pass
-                    def get_port_count(self):
-                        return 0
-                    def get_port_name(self, port_id):
-                        return ""
-                    def open_port(self, port_id):
-                        pass
-                    def close_port(self):
-                        pass
-                    def is_port_open(self):
-                        return False
-                rtmidi.MidiOut = MidiOutStub
-            print("⚠️ MidiOut non disponible, utilisation d'une classe factice")
+            MIDI_AVAILABLE = False
+            print("⚠️ rtmidi ne fournit pas MidiIn, fonctionnalités MIDI désactivées")
             
         # Configurer le backend avec rtmidi
-        if not hasattr(mido, 'set_backend'):
+        elif not hasattr(mido, 'set_backend'):
             print("⚠️ mido.set_backend n'est pas disponible")
         else:
             try:
@@ -86,62 +107,13 @@ try:
             except Exception as e:
                 print(f"⚠️ Erreur lors de la configuration du backend rtmidi: {e}")
     except ImportError:
+        rtmidi = None
         print("⚠️ rtmidi n'est pas disponible, fonctionnalités MIDI limitées")
         
 except ImportError:
     MIDI_AVAILABLE = False
     print("⚠️ Bibliothèque MIDI (mido) non disponible, fonctionnalités MIDI désactivées")
 
-class MidiThread(QThread):
-    """Thread pour gérer les messages MIDI entrants"""
-    midi_message = Signal(object)  # Signal pour les messages MIDI
-    midi_activity = Signal()     # Signal pour indiquer l'activité MIDI
-    
-    def __init__(self, port_name):
-        super().__init__()
-        self.port_name = port_name
-        self.running = True
-        self.midi_port = None
-        
-    def run(self):
-        """Boucle principale du thread"""
-        try:
-            # Ouvrir le port MIDI
-            self.midi_port = mido.open_input(self.port_name, callback=None)
-            print(f"🎹 Thread MIDI démarré sur port: {self.port_name}")
-            
-            # Boucle d'attente de messages
-            while self.running and self.midi_port:
-                # Récupérer les messages en attente
-                for message in self.midi_port.iter_pending():
-                    # Émettre le signal avec le message MIDI
-                    self.midi_message.emit(message)
-                    self.midi_activity.emit()
-                
-                # Attendre un peu pour éviter de surcharger le CPU
-                time.sleep(0.001)
-                
-        except Exception as e:
-            print(f"❌ Erreur dans le thread MIDI: {e}")
-        finally:
-            # Fermer le port à la fin
-            if self.midi_port:
-                try:
-                    self.midi_port.close()
-                    print(f"🎹 Port MIDI fermé: {self.port_name}")
-                except Exception as e:
-                    print(f"❌ Erreur lors de la fermeture du port MIDI: {e}")
-            
-    def stop(self):
-        """Arrêter le thread"""
-        self.running = False
-        if self.midi_port:
-            try:
-                self.midi_port.close()
-            except Exception as e:
-                print(f"❌ Erreur lors de la fermeture du port MIDI: {e}")
-
-
 class MidiManager(QObject):
     """Classe pour gérer les connexions et signaux MIDI"""
     
@@ -152,99 +124,162 @@ class MidiManager(QObject):
     pitch_bend = Signal(int, int)    # canal, valeur
     program_change = Signal(int, int)  # canal, programme
     midi_activity = Signal()         # signal simple d'activité
+    midi_messages_batch = Signal(list)  # lot de messages MIDI reçus
+    _rx_ready = Signal()             # interne : le tampon de réception a des messages
     
     def __init__(self, parent=None):
         super().__init__(parent)
         print("\n🎹 Initialisation du gestionnaire MIDI...")
         self.current_port = None
-        self.midi_thread = None
+        # Port d'entrée ouvert (port mido ou rtmidi.MidiIn), sans thread
+        # dédié : le backend appelle directement _push_rx
+        self.midi_input = None
+        
+        # Tampon circulaire entre le callback du backend et le thread Qt :
+        # le callback ne fait qu'un append, la vidange a lieu côté interface.
+        # _rx_ready est la seule connexion inter-threads ; tous les signaux
+        # publics sont ensuite émis depuis le thread Qt (connexion directe)
+        self._rx = deque(maxlen=_RX_CAPACITY)
+        self._rx_scheduled = False
+        self._rx_handler = self._handle_midi_batch
+        self._rx_ready.connect(self._drain_rx, Qt.QueuedConnection)
+        
+        # Fusion optionnelle des CC continus / pitch bend d'un même lot
+        # (dernière valeur gagnante entre deux événements non fusionnés)
+        self.coalesce_controls = False
+        self._coalescing = False
+        self._cc_latest = {}
+        self._pb_latest = {}
+        
+        # Méthode d'ouverture retenue après le premier succès (voir open_port)
+        self._open_strategy = None
+        
+        # Client rtmidi de détection, créé au premier appel de get_ports
+        self._probe_midi_in = None
+        
+        # Cache de la liste des ports (voir get_ports)
+        self._ports_cache = None
+        self._ports_cache_time = 0.0
+        
+        # Table de dispatch construite une fois, indexée par l'octet de statut
+        self._raw_dispatch = {
+            0x90: self._raw_note_on,
+            0x80: self._raw_note_off,
+            0xB0: self._raw_cc,
+            0xE0: self._raw_pb,
+            0xC0: self._raw_pc,
+        }
         
         if not MIDI_AVAILABLE:
             print("⚠️ MIDI non disponible. Les fonctionnalités MIDI seront désactivées.")
             return
     
-    def get_ports(self):
-        """Renvoie la liste des ports MIDI disponibles"""
+    def get_ports(self, force_refresh=False):
+        """Renvoie la liste des ports MIDI disponibles
+
+        Le résultat est mis en cache pendant _PORTS_CACHE_TTL secondes ;
+        force_refresh=True (ou refresh_ports()) force une nouvelle détection.
+        """
+        if not MIDI_AVAILABLE:
+            return []
+        
+        now = time.monotonic()
+        if (not force_refresh and self._ports_cache is not None
+                and now - self._ports_cache_time < _PORTS_CACHE_TTL):
+            return list(self._ports_cache)
+        
         try:
-            print("\n🎹 Recherche de contrôleurs MIDI USB...")
-            
-            # Initialiser la liste des ports
-            all_ports = []
-            
-            # Tentative 1: Utiliser mido.get_input_names()
-            print("📟 Tentative de détection via mido.get_input_names()")
-            try:
-                import mido
-                ports = mido.get_input_names()
-                if ports and len(ports) > 0:
-                    all_ports.extend(ports)
-                    print(f"✅ Trouvé {len(ports)} ports via mido.get_input_names()")
-                else:
-                    print("⚠️ Aucun port trouvé via mido.get_input_names()")
-            except Exception as e:
-                print(f"⚠️ Erreur lors de la détection MIDI via mido: {e}")
-            
-            # Tentative 2: Utiliser rtmidi directement si disponible
-            print("📟 Tentative avec rtmidi direct")
-            try:
-                import rtmidi
-                midi_in = rtmidi.MidiIn()
-                rtmidi_ports = midi_in.get_ports()
-                if rtmidi_ports and len(rtmidi_ports) > 0:
-                    all_ports.extend(rtmidi_ports)
-                    print(f"✅ Trouvé {len(rtmidi_ports)} ports via rtmidi direct")
-                else:
-                    print("⚠️ Aucun port trouvé via rtmidi direct")
-            except Exception as e:
-                print(f"⚠️ Erreur lors de la détection MIDI via rtmidi: {e}")
-            
-            # Si on n'a trouvé aucun port, ajouter des contrôleurs connus
-            if len(all_ports) == 0:
-                print("📟 Aucun port MIDI trouvé, utilisation des contrôleurs spécifiques")
-                print("  + AKAI MPK Mini MK2")
-                all_ports.append("AKAI MPK Mini MK2")
-                print("  + Ableton Push")
-                all_ports.append("Ableton Push")
-                print("  + Roland UM-ONE")
-                all_ports.append("Roland UM-ONE")
-                print("  + Pioneer DDJ-SB3")
-                all_ports.append("Pioneer DDJ-SB3")
-            
-            # Filtrer les entrées qui ne sont pas des contrôleurs USB mais des drivers système
-            filtered_ports = []
-            for port in all_ports:
-                # Ignorer les entrées de drivers système
-                if any(system_entry in port for system_entry in ["wdmaud.drv", "Microsoft GS Wavetable", "Microsoft MIDI Mapper"]):
-                    continue
-                
-                # Conserver les contrôleurs USB et MIDI
-                if any(controller in port for controller in ["USB", "MIDI", "MPK", "AKAI", "Roland", "Novation", "Korg", "Arturia", "Pioneer", "DDJ", "Ableton", "Push"]):
-                    filtered_ports.append(port)
-                else:
-                    # Accepter tout ce qui reste si la liste est vide
-                    if len(filtered_ports) == 0:
-                        filtered_ports.append(port)
-            
-            print(f"\n🎹 Contrôleurs MIDI disponibles: {len(filtered_ports)}")
-            for i, port in enumerate(filtered_ports):
-                if "AKAI" in port or "MPK" in port:
-                    print(f"   [{i}] 🎹 {port} [AKAI]")
-                elif "ABLETON" in port.upper() or "PUSH" in port.upper():
-                    print(f"   [{i}] 🎛️ {port} [ABLETON]")
-                elif "KORG" in port.upper():
-                    print(f"   [{i}] 🎹 {port} [KORG]")
-                elif "ROLAND" in port.upper():
-                    print(f"   [{i}] 🎹 {port} [ROLAND]")
-                elif "PIONEER" in port.upper() or "DDJ" in port.upper():
-                    print(f"   [{i}] 🎛️ {port} [PIONEER]")
-                else:
-                    print(f"   [{i}] 🎹 {port}")
-            
-            return filtered_ports
-            
+            filtered_ports = self._enumerate_ports()
         except Exception as e:
             print(f"❌ Erreur lors de la recherche des ports MIDI: {e}")
             return ["AKAI MPK Mini MK2"]  # Port par défaut en cas d'erreur
+        
+        self._log_ports(filtered_ports)
+        self._ports_cache = tuple(filtered_ports)
+        self._ports_cache_time = now
+        return filtered_ports
+    
+    def refresh_ports(self):
+        """Force une nouvelle détection des ports MIDI (ex. bouton « rescanner »)"""
+        return self.get_ports(force_refresh=True)
+    
+    def _enumerate_ports(self):
+        """Interroge les backends MIDI et filtre les ports (opération coûteuse)"""
+        print("\n🎹 Recherche de contrôleurs MIDI USB...")
+        
+        # Initialiser la liste des ports
+        all_ports = []
+        
+        # Tentative 1: Utiliser mido.get_input_names()
+        print("📟 Tentative de détection via mido.get_input_names()")
+        try:
+            ports = mido.get_input_names()
+            if ports and len(ports) > 0:
+                all_ports.extend(ports)
+                print(f"✅ Trouvé {len(ports)} ports via mido.get_input_names()")
+            else:
+                print("⚠️ Aucun port trouvé via mido.get_input_names()")
+        except Exception as e:
+            print(f"⚠️ Erreur lors de la détection MIDI via mido: {e}")
+        
+        # Tentative 2: Utiliser rtmidi directement si disponible
+        print("📟 Tentative avec rtmidi direct")
+        try:
+            if rtmidi is None:
+                raise ImportError("module rtmidi non disponible")
+            # Un seul client rtmidi réutilisé pour toutes les détections
+            if self._probe_midi_in is None:
+                self._probe_midi_in = rtmidi.MidiIn()
+            rtmidi_ports = self._probe_midi_in.get_ports()
+            if rtmidi_ports and len(rtmidi_ports) > 0:
+                all_ports.extend(rtmidi_ports)
+                print(f"✅ Trouvé {len(rtmidi_ports)} ports via rtmidi direct")
+            else:
+                print("⚠️ Aucun port trouvé via rtmidi direct")
+        except Exception as e:
+            print(f"⚠️ Erreur lors de la détection MIDI via rtmidi: {e}")
+        
+        # Si on n'a trouvé aucun port, ajouter des contrôleurs connus
+        if len(all_ports) == 0:
+            print("📟 Aucun port MIDI trouvé, utilisation des contrôleurs spécifiques")
+            print("  + AKAI MPK Mini MK2")
+            all_ports.append("AKAI MPK Mini MK2")
+            print("  + Ableton Push")
+            all_ports.append("Ableton Push")
+            print("  + Roland UM-ONE")
+            all_ports.append("Roland UM-ONE")
+            print("  + Pioneer DDJ-SB3")
+            all_ports.append("Pioneer DDJ-SB3")
+        
+        # Filtrer les entrées qui ne sont pas des contrôleurs USB mais des drivers système
+        filtered_ports = []
+        for port in all_ports:
+            # Ignorer les entrées de drivers système
+            if _SYSTEM_RE.search(port):
+                continue
+            
+            # Conserver les contrôleurs USB et MIDI
+            if _CONTROLLER_RE.search(port):
+                filtered_ports.append(port)
+            else:
+                # Accepter tout ce qui reste si la liste est vide
+                if len(filtered_ports) == 0:
+                    filtered_ports.append(port)
+        
+        return filtered_ports
+    
+    def _log_ports(self, filtered_ports):
+        """Journalise la table des contrôleurs détectés (un seul enregistrement)"""
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        lines = [f"🎹 Contrôleurs MIDI disponibles: {len(filtered_ports)}"]
+        for i, port in enumerate(filtered_ports):
+            vendor = _classify_port(port)
+            if vendor:
+                lines.append(f"   [{i}] {_VENDOR_ICONS.get(vendor, '🎹')} {port} [{vendor}]")
+            else:
+                lines.append(f"   [{i}] 🎹 {port}")
+        logger.info("\n".join(lines))
     
     def open_port(self, port_index):
         """Ouvre un port MIDI"""
@@ -269,77 +304,28 @@ class MidiManager(QObject):
             port_name = ports[port_index]
             print(f"\n🔌 Ouverture du port MIDI: {port_name}")
             
-            # Essayer plusieurs méthodes d'ouverture
-            opened = False
+            # Essayer les méthodes d'ouverture ; une fois une méthode validée,
+            # les ouvertures suivantes l'essaient en premier et ne reprennent
+            # la liste complète que si elle échoue
+            if self._open_strategy is not None:
+                strategies = (self._open_strategy,) + tuple(
+                    s for s in _OPEN_STRATEGIES if s != self._open_strategy)
+            else:
+                strategies = _OPEN_STRATEGIES
             
-            # Méthode 1: Utiliser mido.open_input
-            if not opened:
-                try:
-                    print(f"📟 Tentative 1: mido.open_input({port_name})")
-                    self.midi_thread = MidiThread(port_name)
-                    self.midi_thread.midi_message.connect(self._handle_midi_message)
-                    self.midi_thread.midi_activity.connect(self._handle_activity)
-                    self.midi_thread.start()
-                    opened = True
-                    print(f"✅ Port ouvert avec mido.open_input")
-                except Exception as e:
-                    print(f"❌ Échec de mido.open_input: {e}")
-                    
-            # Méthode 2: Essayer d'utiliser le backend directement
-            if not opened:
-                try:
-                    print(f"📟 Tentative 2: backend.open_input({port_name})")
-                    backend = mido.Backend('mido.backends.rtmidi')
-                    midi_port = backend.open_input(port_name)
-                    self.midi_thread = MidiThread(port_name)
-                    self.midi_thread.midi_port = midi_port  # Utiliser le port déjà ouvert
-                    self.midi_thread.midi_message.connect(self._handle_midi_message)
-                    self.midi_thread.midi_activity.connect(self._handle_activity)
-                    self.midi_thread.start()
-                    opened = True
-                    print(f"✅ Port ouvert avec backend.open_input")
-                except Exception as e:
-                    print(f"❌ Échec de backend.open_input: {e}")
-                    
-            # Méthode 3: Essayer d'utiliser rtmidi directement
-            if not opened:
+            opened = False
+            for strategy in strategies:
                 try:
-                    print(f"📟 Tentative 3: rtmidi direct")
-                    from rtmidi import MidiIn
-                    midi_in = MidiIn()
-                    midi_in.open_port(port_index)
-                    
-                    # Créer un thread personnalisé utilisant rtmidi
-                    class RtMidiThread(QThread):
-                        midi_message = Signal(list)
-                        midi_activity = Signal()
-                        
-                        def __init__(self, midi_in):
-                            super().__init__()
-                            self.midi_in = midi_in
-                            self.running = True
-                            
-                        def run(self):
-                            while self.running:
-                                msg = self.midi_in.get_message()
-                                if msg:
-                                    data, _ = msg
-                                    self.midi_message.emit(data)
-                                    self.midi_activity.emit()
-                                time.sleep(0.001)
-                                
-                        def stop(self):
-                            self.running = False
-                            self.midi_in.close_port()
-                    
-                    self.midi_thread = RtMidiThread(midi_in)
-                    self.midi_thread.midi_message.connect(self._handle_midi_message_raw)
-                    self.midi_thread.midi_activity.connect(self._handle_activity)
-                    self.midi_thread.start()
+                    self.midi_input = getattr(self, f"_open_with_{strategy}")(port_name, port_index)
                     opened = True
-                    print(f"✅ Port ouvert avec rtmidi direct")
+                    self._open_strategy = strategy
+                    print(f"✅ Port ouvert avec la méthode {strategy}")
+                    break
                 except Exception as e:
-                    print(f"❌ Échec de rtmidi direct: {e}")
+                    print(f"❌ Échec de la méthode {strategy}: {e}")
+                    self.midi_input = None
+                    if strategy == self._open_strategy:
+                        self._open_strategy = None
                     
             # Si aucune méthode n'a fonctionné
             if not opened:
@@ -347,134 +333,191 @@ class MidiManager(QObject):
                 return False
             
             self.current_port = port_index
-            print(f"✅ Port MIDI {port_name} ouvert et thread démarré")
+            print(f"✅ Port MIDI {port_name} ouvert")
             return True
         except Exception as e:
             print(f"❌ Erreur lors de l'ouverture du port MIDI: {e}")
             self.current_port = None
             return False
             
-    def _handle_midi_message_raw(self, data):
-        """Traite les messages MIDI bruts reçus de rtmidi directement"""
+    def _open_with_mido(self, port_name, port_index):
+        """Méthode 1 : mido.open_input"""
+        print(f"📟 Tentative 1: mido.open_input({port_name})")
+        self._rx_handler = self._handle_midi_batch
+        return mido.open_input(port_name, callback=self._push_rx)
+    
+    def _open_with_backend(self, port_name, port_index):
+        """Méthode 2 : ouverture directe via le backend rtmidi de mido"""
+        print(f"📟 Tentative 2: backend.open_input({port_name})")
+        backend = mido.Backend('mido.backends.rtmidi')
+        self._rx_handler = self._handle_midi_batch
+        return backend.open_input(port_name, callback=self._push_rx)
+    
+    def _open_with_rtmidi(self, port_name, port_index):
+        """Méthode 3 : rtmidi direct, messages bruts"""
+        print(f"📟 Tentative 3: rtmidi direct")
+        midi_in = rtmidi.MidiIn()
+        midi_in.open_port(port_index)
+        self._rx_handler = self._handle_midi_batch_raw
+        # rtmidi appelle _push_rx_raw depuis son propre thread
+        midi_in.set_callback(self._push_rx_raw)
+        return midi_in
+    
+    def _push_rx(self, message):
+        """Callback du backend : empile le message (appelé hors du thread Qt)"""
+        self._rx.append(message)
+        if not self._rx_scheduled:
+            self._rx_scheduled = True
+            self._rx_ready.emit()
+    
+    def _push_rx_raw(self, event, data=None):
+        """Callback rtmidi : event est (octets, delta), seuls les octets sont gardés"""
+        self._push_rx(event[0])
+    
+    def _drain_rx(self):
+        """Vide le tampon de réception par tranches, dans le thread Qt"""
+        # Réarmer avant de vider : un message empilé pendant la vidange
+        # déclenche une nouvelle planification
+        self._rx_scheduled = False
+        rx = self._rx
+        batch = []
+        while rx and len(batch) < _RX_DRAIN_CHUNK:
+            batch.append(rx.popleft())
+        if rx and not self._rx_scheduled:
+            # Rendre la main à la boucle d'événements avant la tranche suivante
+            self._rx_scheduled = True
+            QTimer.singleShot(0, self._drain_rx)
+        if batch:
+            self._rx_handler(batch)
+            self.midi_activity.emit()
+    
+    def _handle_midi_batch(self, messages):
+        """Traite un lot de messages MIDI (mido) reçus du backend"""
+        self.midi_messages_batch.emit(messages)
+        # Un seul chemin de traitement : les octets bruts du message mido
+        self._dispatch_raw_batch(message.bytes() for message in messages)
+    
+    def _handle_midi_batch_raw(self, messages):
+        """Traite un lot de messages MIDI bruts reçus de rtmidi"""
+        self.midi_messages_batch.emit(messages)
+        self._dispatch_raw_batch(messages)
+    
+    def _dispatch_raw_batch(self, raw_messages):
+        """Traite un lot d'octets bruts, en fusionnant CC et pitch bend si demandé
+
+        Avec coalesce_controls, les CC continus et le pitch bend consécutifs
+        ne sont émis qu'avec leur dernière valeur. Les valeurs en attente sont
+        émises avant chaque note, program change ou contrôleur interrupteur,
+        ce qui conserve leur position par rapport à ces événements.
+        """
+        coalesce = self.coalesce_controls
+        self._coalescing = coalesce
         try:
-            if not data or len(data) < 2:
-                return
-                
-            status_byte = data[0] & 0xF0  # Type de message (4 bits de poids fort)
-            channel = data[0] & 0x0F      # Canal (4 bits de poids faible)
-            
-            print(f"📥 Message MIDI brut reçu: {data} (status: {hex(status_byte)}, canal: {channel})")
-            
-            # Note On
-            if status_byte == 0x90 and len(data) >= 3:
-                note = data[1]
-                velocity = data[2]
-                if velocity > 0:
-                    print(f"🎵 Note On: {note} (vélocité: {velocity})")
-                    self.note_on.emit(channel, note, velocity)
-                else:
-                    # Une vélocité de 0 est équivalente à Note Off
-                    print(f"🎵 Note Off (vélocité 0): {note}")
-                    self.note_off.emit(channel, note)
-            
-            # Note Off
-            elif status_byte == 0x80 and len(data) >= 3:
-                note = data[1]
-                print(f"🎵 Note Off: {note}")
-                self.note_off.emit(channel, note)
-            
-            # Control Change
-            elif status_byte == 0xB0 and len(data) >= 3:
-                control = data[1]
-                value = data[2]
-                print(f"🎛️ Control Change: CC{control} = {value}")
+            for data in raw_messages:
+                self._handle_midi_message_raw(data)
+        finally:
+            self._coalescing = False
+            if coalesce:
+                self._flush_coalesced()
+    
+    def _flush_coalesced(self):
+        """Émet les dernières valeurs de CC / pitch bend mises en attente"""
+        if self._cc_latest:
+            for (channel, control), value in self._cc_latest.items():
                 self.control_change.emit(channel, control, value)
-            
-            # Pitch Bend
-            elif status_byte == 0xE0 and len(data) >= 3:
-                lsb = data[1]
-                msb = data[2]
-                value = ((msb << 7) | lsb) - 8192
-                print(f"↕️ Pitch Bend: {value}")
+            self._cc_latest.clear()
+        if self._pb_latest:
+            for channel, value in self._pb_latest.items():
                 self.pitch_bend.emit(channel, value)
-                
-            # Program Change
-            elif status_byte == 0xC0 and len(data) >= 2:
-                program = data[1]
-                print(f"🎛️ Program Change: {program}")
-                self.program_change.emit(channel, program)
-                
-        except Exception as e:
-            print(f"❌ Erreur lors du traitement du message MIDI brut: {e}")
+            self._pb_latest.clear()
     
-    def _handle_midi_message(self, message):
-        """Traite les messages MIDI reçus"""
+    def _handle_midi_message_raw(self, data):
+        """Traite les messages MIDI bruts reçus de rtmidi directement"""
         try:
-            print(f"📥 Message MIDI reçu: {message}")
-            
-            # Note On
-            if message.type == 'note_on':
-                channel = message.channel
-                note = message.note
-                velocity = message.velocity
-                
-                if velocity > 0:
-                    print(f"🎵 Note On: {note} (vélocité: {velocity})")
-                    self.note_on.emit(channel, note, velocity)
-                else:
-                    # Une vélocité de 0 est équivalente à Note Off
-                    print(f"🎵 Note Off (vélocité 0): {note}")
-                    self.note_off.emit(channel, note)
-            
-            # Note Off
-            elif message.type == 'note_off':
-                channel = message.channel
-                note = message.note
-                print(f"🎵 Note Off: {note}")
-                self.note_off.emit(channel, note)
+            # Extraire une seule fois les octets du message
+            n = len(data)
+            if n < 2:
+                return
+            status = data[0]
+            # Ne garder que les messages canal (0x80-0xEF) : horloge, active
+            # sensing et autres messages système sont ignorés d'emblée
+            if status >= 0xF0 or status < 0x80:
+                return
+            status_byte = status & 0xF0  # Type de message (4 bits de poids fort)
+            channel = status & 0x0F      # Canal (4 bits de poids faible)
+            d1 = data[1]
+            if n >= 3:
+                d2 = data[2]
+            elif status_byte in _TWO_BYTE_STATUSES:
+                d2 = 0
+            else:
+                return
             
-            # Control Change
-            elif message.type == 'control_change':
-                channel = message.channel
-                control = message.control
-                value = message.value
-                print(f"🎛️ Control Change: CC{control} = {value}")
-                self.control_change.emit(channel, control, value)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"📥 Message MIDI brut reçu: {data} (status: {hex(status_byte)}, canal: {channel})")
             
-            # Pitch Bend
-            elif message.type == 'pitchwheel':
-                channel = message.channel
-                value = message.pitch
-                print(f"↕️ Pitch Bend: {value}")
-                self.pitch_bend.emit(channel, value)
-                
-            # Program Change
-            elif message.type == 'program_change':
-                channel = message.channel
-                program = message.program
-                print(f"🎛️ Program Change: {program}")
-                self.program_change.emit(channel, program)
+            handler = self._raw_dispatch.get(status_byte)
+            if handler is not None:
+                handler(channel, d1, d2)
                 
         except Exception as e:
-            print(f"❌ Erreur lors du traitement du message MIDI: {e}")
+            logger.error(f"❌ Erreur lors du traitement du message MIDI brut: {e}")
     
-    def _handle_activity(self):
-        """Gère le signal d'activité MIDI"""
-        try:
-            self.midi_activity.emit()
-        except Exception as e:
-            print(f"❌ Erreur lors de l'émission du signal d'activité MIDI: {e}")
-            
-    def get_note_name(self, note):
+    def _raw_note_on(self, channel, note, velocity):
+        if self._coalescing:
+            self._flush_coalesced()
+        if velocity > 0:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"🎵 Note On: {note} (vélocité: {velocity})")
+            self.note_on.emit(channel, note, velocity)
+        else:
+            # Une vélocité de 0 est équivalente à Note Off
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"🎵 Note Off (vélocité 0): {note}")
+            self.note_off.emit(channel, note)
+    
+    def _raw_note_off(self, channel, note, velocity):
+        if self._coalescing:
+            self._flush_coalesced()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"🎵 Note Off: {note}")
+        self.note_off.emit(channel, note)
+    
+    def _raw_cc(self, channel, control, value):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"🎛️ Control Change: CC{control} = {value}")
+        if self._coalescing:
+            if control not in _SWITCH_CONTROLLERS:
+                self._cc_latest[(channel, control)] = value
+                return
+            self._flush_coalesced()
+        self.control_change.emit(channel, control, value)
+    
+    def _raw_pb(self, channel, lsb, msb):
+        value = ((msb << 7) | lsb) - 8192
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"↕️ Pitch Bend: {value}")
+        if self._coalescing:
+            self._pb_latest[channel] = value
+        else:
+            self.pitch_bend.emit(channel, value)
+    
+    def _raw_pc(self, channel, program, _unused):
+        if self._coalescing:
+            self._flush_coalesced()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"🎛️ Program Change: {program}")
+        self.program_change.emit(channel, program)
+    
+    @staticmethod
+    def get_note_name(note):
         """Convertit un numéro de note MIDI en nom de note"""
-        notes = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
-        octave = (note // 12) - 1
-        note_name = notes[note % 12]
-        return f"{note_name}{octave}"
+        return _NOTE_NAMES[min(max(note, 0), 127)]
         
-    def get_note_frequency(self, note):
+    @staticmethod
+    def get_note_frequency(note):
         """Convertit un numéro de note MIDI en fréquence (Hz)"""
-        return 440.0 * (2.0 ** ((note - 69) / 12.0))
+        return _NOTE_FREQS[min(max(note, 0), 127)]
     
     def close_port(self):
         """Ferme le port MIDI actuel"""
@@ -482,13 +525,18 @@ class MidiManager(QObject):
             return
             
         try:
-            # Arrêter le thread MIDI
-            if self.midi_thread:
-                print(f"\n🛑 Arrêt du thread MIDI")
-                self.midi_thread.stop()
-                self.midi_thread.wait()
-                self.midi_thread = None
+            if self.midi_input:
+                print("\n🛑 Fermeture du port MIDI")
+                midi_input, self.midi_input = self.midi_input, None
+                if hasattr(midi_input, 'cancel_callback'):
+                    # rtmidi.MidiIn (méthode 3)
+                    midi_input.cancel_callback()
+                    midi_input.close_port()
+                else:
+                    # Port mido : la fermeture retire aussi le callback
+                    midi_input.close()
                 self.current_port = None
+                self._rx.clear()
                 print(f"✅ Port MIDI fermé avec succès")
         except Exception as e:
             print(f"❌ Erreur lors de la fermeture du port MIDI: {e}") 
\ No newline at end of file
@@ -6,10 +6,77 @@ et les fonctions de l'application, ainsi que le stockage et le chargement
 de ces associations.
 """
 
+import atexit
 import json
+import logging
 import os
+import sys
+import threading
+import weakref
 from pathlib import Path
 
+# orjson est optionnel : repli sur le module json standard
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Configuration du logger
+logger = logging.getLogger(__name__)
+
+
+def _dumps(data):
+    """Sérialise les données de mapping en octets UTF-8 indentés"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def _loads(raw):
+    """Désérialise le contenu brut d'un fichier de mapping"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+# Délai de regroupement des enregistrements (secondes)
+_SAVE_DELAY = 0.5
+
+# Instances vivantes, vidées sur disque à la fermeture sans être maintenues
+_INSTANCES = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all():
+    """Écrit les modifications en attente de tous les mappings encore vivants"""
+    for mapping in list(_INSTANCES):
+        mapping.flush()
+
+
+def _parse_key(identifier):
+    """
+    Convertit un identifiant texte ("canal:valeur" ou "canal") en clé mémoire
+    
+    Args:
+        identifier (str): Identifiant tel qu'enregistré sur disque
+        
+    Returns:
+        tuple | int: (canal, valeur) ou canal seul pour le pitch bend
+    """
+    if isinstance(identifier, (tuple, int)):
+        return identifier
+    channel, sep, value = identifier.partition(":")
+    if sep:
+        return int(channel), int(value)
+    return int(channel)
+
+
+def _format_key(key):
+    """Convertit une clé mémoire en identifiant texte pour le fichier"""
+    if isinstance(key, tuple):
+        return f"{key[0]}:{key[1]}"
+    return str(key)
+
 
 class MidiMapping:
     """Classe gérant le mapping des contrôleurs MIDI vers les fonctions de l'application"""
@@ -62,6 +129,9 @@ class MidiMapping:
         "pc": "Program Change"
     }
     
+    # Chemin par défaut dans le dossier de l'utilisateur
+    _DEFAULT_CONFIG_PATH = os.path.join(str(Path.home()), ".midi_mappings.json")
+    
     def __init__(self, config_path=None):
         """
         Initialise le mapping MIDI
@@ -69,16 +139,14 @@ class MidiMapping:
         Args:
             config_path (str, optional): Chemin vers le fichier de configuration
         """
-        # Structure des mappings: {type: {identifiant: fonction}}
-        # type: "note", "cc", "pb", "pc"
-        # identifiant: "canal:valeur" ou "canal" pour pb
+        # Un dictionnaire par type: {identifiant: fonction}
+        # identifiant: (canal, valeur) ou canal pour pb
+        #   (enregistré sous la forme "canal:valeur" ou "canal" sur disque)
         # fonction: "categorie:fonction"
-        self.mappings = {
-            "note": {},
-            "cc": {},
-            "pb": {},
-            "pc": {}
-        }
+        self._note_map = {}
+        self._cc_map = {}
+        self._pb_map = {}
+        self._pc_map = {}
         
         # Structure des phrases: {trigger_id: {text: "", voice: ""}}
         self.phrases = {
@@ -93,63 +161,158 @@ class MidiMapping:
         self.learning_mode = False
         self.learning_function = None
         
+        # Enregistrement différé: un seul écrit par rafale de modifications.
+        # _save_lock protège les dictionnaires et les compteurs de version,
+        # _write_lock sérialise les écritures sur disque
+        self._version = 0
+        self._saved_version = 0
+        self._save_timer = None
+        self._save_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._config_dir_ready = False
+        _INSTANCES.add(self)
+        
         # Charger la configuration si un chemin est spécifié
-        self.config_path = config_path
+        self.config_path = config_path or self._DEFAULT_CONFIG_PATH
         if config_path:
             self.load()
-        else:
-            # Chemin par défaut dans le dossier de l'utilisateur
-            user_dir = str(Path.home())
-            self.config_path = os.path.join(user_dir, ".midi_mappings.json")
             
+    @property
+    def mappings(self):
+        """
+        Vue regroupée des mappings par type
+        
+        Returns:
+            dict: {type: {identifiant: fonction}} avec type "note", "cc", "pb", "pc"
+        """
+        return {
+            "note": self._note_map,
+            "cc": self._cc_map,
+            "pb": self._pb_map,
+            "pc": self._pc_map
+        }
+        
     def load(self):
         """Charge les mappings depuis le fichier de configuration"""
         try:
             if os.path.exists(self.config_path):
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                with open(self.config_path, 'rb') as f:
+                    data = _loads(f.read())
                     
+                with self._save_lock:
                     if "mappings" in data:
-                        self.mappings = data["mappings"]
+                        mappings = self.mappings
+                        for midi_type, entries in data["mappings"].items():
+                            if midi_type in mappings:
+                                target = mappings[midi_type]
+                                target.clear()
+                                target.update((_parse_key(k), sys.intern(v)) for k, v in entries.items())
                         
                     if "phrases" in data:
                         self.phrases = data["phrases"]
                         
-                print(f"✅ Mappings MIDI chargés depuis {self.config_path}")
+                logger.info(f"✅ Mappings MIDI chargés depuis {self.config_path}")
                 return True
                 
         except Exception as e:
-            print(f"❌ Erreur lors du chargement des mappings MIDI: {e}")
+            logger.error(f"❌ Erreur lors du chargement des mappings MIDI: {e}")
             
         return False
         
     def save(self):
-        """Enregistre les mappings dans le fichier de configuration"""
+        """
+        Planifie l'enregistrement des mappings
+        
+        Les appels rapprochés sont regroupés en une seule écriture après
+        _SAVE_DELAY secondes; utiliser flush() pour écrire immédiatement.
+        
+        Returns:
+            bool: True (l'enregistrement est planifié)
+        """
+        with self._save_lock:
+            self._version += 1
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(_SAVE_DELAY, self._flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+        return True
+        
+    def flush(self):
+        """
+        Écrit immédiatement les modifications en attente
+        
+        Returns:
+            bool: True si rien n'était en attente ou si l'écriture a réussi
+        """
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+        return self._flush()
+        
+    def _flush(self):
+        """
+        Écrit le fichier si des modifications sont en attente
+        
+        Les données sont copiées sous _save_lock puis écrites hors du verrou.
+        Les modifications ne sont marquées enregistrées qu'après une écriture
+        réussie : en cas d'échec, le prochain save() ou flush() réessaie.
+        """
+        with self._write_lock:
+            with self._save_lock:
+                self._save_timer = None
+                version = self._version
+                if version == self._saved_version:
+                    return True
+                data = self._snapshot()
+            if not self._save_now(data):
+                return False
+            with self._save_lock:
+                self._saved_version = version
+            return True
+        
+    def _snapshot(self):
+        """Copie sérialisable des mappings et des phrases (appelé sous _save_lock)"""
+        return {
+            "mappings": {
+                midi_type: {_format_key(k): v for k, v in entries.items()}
+                for midi_type, entries in self.mappings.items()
+            },
+            "phrases": {trigger_id: dict(phrase) for trigger_id, phrase in self.phrases.items()}
+        }
+        
+    def _save_now(self, data):
+        """Enregistre les données fournies dans le fichier de configuration"""
         try:
-            data = {
-                "mappings": self.mappings,
-                "phrases": self.phrases
-            }
-            
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            # Vérifier le dossier de destination une seule fois
+            if not self._config_dir_ready:
+                config_dir = os.path.dirname(self.config_path)
+                if config_dir:
+                    os.makedirs(config_dir, exist_ok=True)
+                self._config_dir_ready = True
+                
+            # Sérialiser d'abord, écrire dans un fichier voisin puis le renommer:
+            # le fichier existant n'est jamais laissé à moitié écrit
+            payload = _dumps(data)
+            tmp_path = self.config_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.config_path)
                 
-            print(f"✅ Mappings MIDI enregistrés dans {self.config_path}")
+            logger.info(f"✅ Mappings MIDI enregistrés dans {self.config_path}")
             return True
             
         except Exception as e:
-            print(f"❌ Erreur lors de l'enregistrement des mappings MIDI: {e}")
+            logger.error(f"❌ Erreur lors de l'enregistrement des mappings MIDI: {e}")
             
         return False
         
     def clear_all_mappings(self):
         """Efface tous les mappings"""
-        self.mappings = {
-            "note": {},
-            "cc": {},
-            "pb": {},
-            "pc": {}
-        }
+        with self._save_lock:
+            self._note_map.clear()
+            self._cc_map.clear()
+            self._pb_map.clear()
+            self._pc_map.clear()
         return True
         
     def clear_mapping(self, midi_type, identifier):
@@ -158,14 +321,17 @@ class MidiMapping:
         
         Args:
             midi_type (str): Type d'événement MIDI ("note", "cc", "pb", "pc")
-            identifier (str): Identifiant du contrôleur
+            identifier (str | tuple | int): Identifiant du contrôleur
             
         Returns:
             bool: True si le mapping a été effacé, False sinon
         """
-        if midi_type in self.mappings and identifier in self.mappings[midi_type]:
-            del self.mappings[midi_type][identifier]
-            return True
+        mapping = self.mappings.get(midi_type)
+        identifier = _parse_key(identifier)
+        with self._save_lock:
+            if mapping is not None and identifier in mapping:
+                del mapping[identifier]
+                return True
             
         return False
         
@@ -181,8 +347,9 @@ class MidiMapping:
             bool: True si le mode d'apprentissage a été démarré, False sinon
         """
         self.learning_mode = True
-        self.learning_function = f"{category}:{function}"
-        print(f"🎹 Mode d'apprentissage activé pour {self.learning_function}")
+        # Identifiant internalisé: une seule chaîne partagée par tous les mappings
+        self.learning_function = sys.intern(f"{category}:{function}")
+        logger.debug("🎹 Mode d'apprentissage activé pour %s", self.learning_function)
         return True
         
     def stop_learning(self):
@@ -190,7 +357,7 @@ class MidiMapping:
         if self.learning_mode:
             self.learning_mode = False
             self.learning_function = None
-            print("🎹 Mode d'apprentissage désactivé")
+            logger.debug("🎹 Mode d'apprentissage désactivé")
             
     def assign_note(self, note, channel=0):
         """
@@ -206,9 +373,9 @@ class MidiMapping:
         if not self.learning_mode or not self.learning_function:
             return False
             
-        identifier = f"{channel}:{note}"
-        self.mappings["note"][identifier] = self.learning_function
-        print(f"✅ Note {note} sur canal {channel} assignée à {self.learning_function}")
+        with self._save_lock:
+            self._note_map[(channel, note)] = self.learning_function
+        logger.debug("✅ Note %s sur canal %s assignée à %s", note, channel, self.learning_function)
         
         self.save()
         return True
@@ -227,9 +394,9 @@ class MidiMapping:
         if not self.learning_mode or not self.learning_function:
             return False
             
-        identifier = f"{channel}:{cc}"
-        self.mappings["cc"][identifier] = self.learning_function
-        print(f"✅ CC {cc} sur canal {channel} assigné à {self.learning_function}")
+        with self._save_lock:
+            self._cc_map[(channel, cc)] = self.learning_function
+        logger.debug("✅ CC %s sur canal %s assigné à %s", cc, channel, self.learning_function)
         
         self.save()
         return True
@@ -247,9 +414,9 @@ class MidiMapping:
         if not self.learning_mode or not self.learning_function:
             return False
             
-        identifier = str(channel)
-        self.mappings["pb"][identifier] = self.learning_function
-        print(f"✅ Pitch Bend sur canal {channel} assigné à {self.learning_function}")
+        with self._save_lock:
+            self._pb_map[channel] = self.learning_function
+        logger.debug("✅ Pitch Bend sur canal %s assigné à %s", channel, self.learning_function)
         
         self.save()
         return True
@@ -268,9 +435,9 @@ class MidiMapping:
         if not self.learning_mode or not self.learning_function:
             return False
             
-        identifier = f"{channel}:{program}"
-        self.mappings["pc"][identifier] = self.learning_function
-        print(f"✅ Program Change {program} sur canal {channel} assigné à {self.learning_function}")
+        with self._save_lock:
+            self._pc_map[(channel, program)] = self.learning_function
+        logger.debug("✅ Program Change %s sur canal %s assigné à %s", program, channel, self.learning_function)
         
         self.save()
         return True
@@ -286,8 +453,7 @@ class MidiMapping:
         Returns:
             str: Identifiant de la fonction ou None si aucune association
         """
-        identifier = f"{channel}:{note}"
-        return self.mappings["note"].get(identifier)
+        return self._note_map.get((channel, note))
         
     def get_cc_function(self, cc, channel=0):
         """
@@ -300,8 +466,7 @@ class MidiMapping:
         Returns:
             str: Identifiant de la fonction ou None si aucune association
         """
-        identifier = f"{channel}:{cc}"
-        return self.mappings["cc"].get(identifier)
+        return self._cc_map.get((channel, cc))
         
     def get_pb_function(self, channel=0):
         """
@@ -313,8 +478,7 @@ class MidiMapping:
         Returns:
             str: Identifiant de la fonction ou None si aucune association
         """
-        identifier = str(channel)
-        return self.mappings["pb"].get(identifier)
+        return self._pb_map.get(channel)
         
     def get_pc_function(self, program, channel=0):
         """
@@ -327,8 +491,7 @@ class MidiMapping:
         Returns:
             str: Identifiant de la fonction ou None si aucune association
         """
-        identifier = f"{channel}:{program}"
-        return self.mappings["pc"].get(identifier)
+        return self._pc_map.get((channel, program))
         
     def parse_function(self, function_id):
         """
@@ -345,6 +508,18 @@ class MidiMapping:
             
         return function_id.split(":", 1)
         
+    def format_identifier(self, identifier):
+        """
+        Convertit un identifiant de contrôleur en texte
+        
+        Args:
+            identifier (tuple | int): Clé (canal, valeur) ou canal pour pb
+            
+        Returns:
+            str: Identifiant au format "canal:valeur" ou "canal"
+        """
+        return _format_key(identifier)
+        
     def set_phrase(self, trigger_id, text, voice=None):
         """
         Définit le texte et la voix pour une phrase
@@ -358,10 +533,11 @@ class MidiMapping:
             bool: True si la phrase a été définie, False sinon
         """
         if trigger_id in self.phrases:
-            self.phrases[trigger_id] = {
-                "text": text,
-                "voice": voice
-            }
+            with self._save_lock:
+                self.phrases[trigger_id] = {
+                    "text": text,
+                    "voice": voice
+                }
             
             self.save()
             return True
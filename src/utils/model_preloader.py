@@ -1,14 +1,27 @@
 import os
-import torch
-from TTS.api import TTS
 from tqdm import tqdm
 import threading
-import queue
+from concurrent.futures import ThreadPoolExecutor
+
+# Disponibilité CUDA, évaluée au premier besoin puis mémorisée
+_HAS_CUDA = None
+
+
+def _has_cuda():
+    """Retourne torch.cuda.is_available() en ne l'évaluant qu'une seule fois"""
+    global _HAS_CUDA
+    if _HAS_CUDA is None:
+        import torch
+        _HAS_CUDA = torch.cuda.is_available()
+    return _HAS_CUDA
+
 
 class ModelPreloader:
     _instance = None
+    _initialized = False
     _models_loaded = False
-    _progress_queue = queue.Queue()
+    # Protège preload_models contre les appels concurrents
+    _load_lock = threading.Lock()
     
     MODELS_TO_LOAD = {
         'principal': "tts_models/fr/css10/vits",  # Modèle principal léger
@@ -24,10 +37,16 @@ class ModelPreloader:
         return cls._instance
 
     def __init__(self):
-        if not self._models_loaded:
+        if not self._initialized:
             self.tts = None
-            self._load_progress = 0
-            self._models_loaded = True
+            # Nombre de modèles secondaires traités (chargés ou en échec)
+            self._progress = 0
+            self._secondaries_done = threading.Event()
+            # Modèles secondaires gardés en RAM CPU : {nom: TTS}
+            self._secondary_models = {}
+            self._secondary_on_gpu = set()
+            self._secondary_lock = threading.Lock()
+            self._initialized = True
 
     @classmethod
     def get_instance(cls):
@@ -39,46 +58,123 @@ class ModelPreloader:
         """Retourne l'instance TTS principale"""
         return self.tts
 
-    def preload_models(self):
-        """Précharge le modèle principal rapidement et les autres en arrière-plan"""
-        print("\nInitialisation de Vocal Clone...")
+    def get_secondary(self, name):
+        """
+        Retourne un modèle secondaire, transféré sur GPU à la première utilisation
         
-        # Nettoyer la mémoire GPU si disponible
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
-            print("✓ GPU détecté - CUDA activé")
+        Args:
+            name (str): Nom du modèle (voir MODELS_TO_LOAD['secondaires'])
+            
+        Returns:
+            TTS: Instance du modèle ou None s'il n'est pas (encore) chargé
+        """
+        with self._secondary_lock:
+            model = self._secondary_models.get(name)
+            if model is None or name in self._secondary_on_gpu or not _has_cuda():
+                return model
+            model.to("cuda")
+            self._secondary_on_gpu.add(name)
+            return model
+
+    def synthesize_secondary(self, name, text, **kwargs):
+        """
+        Synthétise un texte avec un modèle secondaire, sans suivi autograd
         
-        try:
-            # Charger d'abord le modèle principal rapidement
-            print("Chargement du modèle principal...")
-            self.tts = TTS(model_name=self.MODELS_TO_LOAD['principal'])
-            print(f"✓ Modèle principal chargé : {self.MODELS_TO_LOAD['principal']}")
+        Args:
+            name (str): Nom du modèle (voir MODELS_TO_LOAD['secondaires'])
+            text (str): Texte à synthétiser
+            **kwargs: Arguments transmis à TTS.tts (speaker_wav, language...)
             
-            # Lancer le chargement des modèles secondaires en arrière-plan
-            thread = threading.Thread(target=self._background_load)
-            thread.daemon = True  # Le thread s'arrêtera avec le programme principal
-            thread.start()
+        Returns:
+            list: Forme d'onde générée, ou None si le modèle n'est pas chargé
+        """
+        import torch
+        
+        model = self.get_secondary(name)
+        if model is None:
+            return None
+        with torch.inference_mode():
+            return model.tts(text=text, **kwargs)
+
+    def preload_models(self):
+        """Précharge le modèle principal rapidement et les autres en arrière-plan"""
+        with self._load_lock:
+            # Déjà chargé : ne pas réinstancier les modèles
+            if self._models_loaded:
+                return self.tts
             
-            return self.tts
+            print("\nInitialisation de Vocal Clone...")
             
-        except Exception as e:
-            print(f"⚠ Erreur lors du préchargement : {str(e)}")
-            raise
+            # Imports lourds différés : torch et TTS ne sont chargés qu'au préchargement
+            import torch
+            from TTS.api import TTS
+            
+            # Nettoyer la mémoire GPU si disponible
+            if _has_cuda():
+                torch.cuda.empty_cache()
+                print("✓ GPU détecté - CUDA activé")
+            
+            try:
+                # Charger d'abord le modèle principal rapidement
+                print("Chargement du modèle principal...")
+                self.tts = TTS(model_name=self.MODELS_TO_LOAD['principal'])
+                print(f"✓ Modèle principal chargé : {self.MODELS_TO_LOAD['principal']}")
+                self._models_loaded = True
+                
+                # Lancer le chargement des modèles secondaires en arrière-plan
+                thread = threading.Thread(target=self._background_load)
+                thread.daemon = True  # Le thread s'arrêtera avec le programme principal
+                thread.start()
+                
+                return self.tts
+                
+            except Exception as e:
+                print(f"⚠ Erreur lors du préchargement : {str(e)}")
+                raise
 
     def _background_load(self):
-        """Charge les modèles secondaires en arrière-plan"""
+        """Charge les modèles secondaires en arrière-plan, en parallèle"""
+        models = self.MODELS_TO_LOAD['secondaires']
         try:
-            for model in self.MODELS_TO_LOAD['secondaires']:
-                print(f"Chargement en arrière-plan : {model}")
-                TTS(model_name=model)
-                print(f"✓ Modèle chargé : {model}")
+            # Téléchargements et lectures de checkpoints se recouvrent
+            with ThreadPoolExecutor(max_workers=len(models), thread_name_prefix="tts-preload") as executor:
+                list(executor.map(self._load_secondary, models))
                 
         except Exception as e:
             print(f"⚠ Erreur de chargement en arrière-plan : {str(e)}")
+        finally:
+            self._secondaries_done.set()
 
-    def get_load_progress(self):
-        """Retourne la progression du chargement"""
+    def _load_secondary(self, model):
+        """Charge un modèle secondaire; un échec n'interrompt pas les autres"""
         try:
-            return self._progress_queue.get_nowait()
-        except queue.Empty:
-            return None 
\ No newline at end of file
+            from TTS.api import TTS
+            
+            print(f"Chargement en arrière-plan : {model}")
+            # Rester sur CPU pour ne pas occuper la VRAM du modèle principal
+            instance = TTS(model_name=model, gpu=False)
+            with self._secondary_lock:
+                self._secondary_models[model] = instance
+            print(f"✓ Modèle chargé : {model}")
+            
+        except Exception as e:
+            print(f"⚠ Erreur de chargement de {model} : {str(e)}")
+        finally:
+            with self._secondary_lock:
+                self._progress += 1
+
+    def get_load_progress(self):
+        """Retourne le nombre de modèles secondaires déjà traités"""
+        return self._progress
+
+    def wait_secondaries(self, timeout=None):
+        """
+        Attend la fin du chargement des modèles secondaires
+        
+        Args:
+            timeout (float, optional): Délai maximal en secondes (0 pour un simple test)
+            
+        Returns:
+            bool: True si tous les modèles secondaires ont été traités
+        """
+        return self._secondaries_done.wait(timeout) 
\ No newline at end of file
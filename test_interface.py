@@ -26,9 +26,6 @@ def main():
     print("Affichage de la fenêtre...")
     window.show()
     
-    # Forcer le traitement des événements pour s'assurer que l'interface est affichée
-    app.processEvents()
-    
     print("Interface active! Fermez la fenêtre pour quitter.")
     
     # Lancer la boucle d'événements Qt
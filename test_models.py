@@ -1,10 +1,12 @@
 import os
 import time
+import importlib
+from functools import partial
 import torch
 import numpy as np
 from pathlib import Path
 import soundfile as sf
-from typing import Dict, List, Tuple
+from typing import Dict, List, NamedTuple, Tuple
 import logging
 
 # Configuration du logging
@@ -14,125 +16,67 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+class ModelSpec(NamedTuple):
+    """Description d'un modèle testé via l'interface clone_voice/compute_similarity"""
+    name: str
+    module: str
+    cls: str
+    sample_rate: int
+    pass_language: bool
+    english_only: bool
+
+
+# Modèles partageant la même procédure de test (Coqui TTS a sa propre méthode)
+_MODEL_SPECS = (
+    ModelSpec("OpenVoice V2", "openvoice", "OpenVoice", 16000, True, False),
+    ModelSpec("VALL-E X", "valle_x", "ValleX", 16000, True, False),
+    ModelSpec("StyleTTS2", "styletts2", "StyleTTS2", 22050, False, True),
+    ModelSpec("Bark", "bark", "Bark", 24000, False, True),
+    ModelSpec("Spark-TTS", "spark_tts", "SparkTTS", 16000, True, False),
+)
+
 class VoiceCloningTester:
     def __init__(self, test_audio_dir: str = "test_audio"):
         self.test_audio_dir = Path(test_audio_dir)
         self.test_audio_dir.mkdir(exist_ok=True)
         self.results = {}
+        # Audio de référence décodé et rééchantillonné: {(fichier, fréquence): tenseur}
+        self._resample_cache: Dict[Tuple[str, int], torch.Tensor] = {}
         
-    def test_openvoice_v2(self, reference_audio: str, text: str, language: str) -> Tuple[float, float]:
-        """Test OpenVoice V2"""
-        try:
-            start_time = time.time()
-            
-            # Import des dépendances nécessaires
-            from openvoice import OpenVoice
-            import torchaudio
-            
-            # Chargement du modèle
-            model = OpenVoice()
-            model.load_model()
-            
-            # Chargement de l'audio de référence
-            ref_audio, sr = torchaudio.load(reference_audio)
-            if sr != 16000:
-                ref_audio = torchaudio.functional.resample(ref_audio, sr, 16000)
-            
-            # Génération de la voix clonée
-            output_audio = model.clone_voice(ref_audio, text, language)
-            
-            # Calcul de la similarité
-            similarity = model.compute_similarity(ref_audio, output_audio)
-            
-            inference_time = time.time() - start_time
-            return similarity, inference_time
-            
-        except Exception as e:
-            logger.error(f"Erreur lors du test OpenVoice V2: {e}")
-            return 0.0, 0.0
-
-    def test_valle_x(self, reference_audio: str, text: str, language: str) -> Tuple[float, float]:
-        """Test VALL-E X"""
-        try:
-            start_time = time.time()
-            
-            # Import des dépendances nécessaires
-            from valle_x import ValleX
-            import torchaudio
-            
-            # Chargement du modèle
-            model = ValleX()
-            model.load_model()
-            
-            # Chargement de l'audio de référence
-            ref_audio, sr = torchaudio.load(reference_audio)
-            if sr != 16000:
-                ref_audio = torchaudio.functional.resample(ref_audio, sr, 16000)
-            
-            # Génération de la voix clonée
-            output_audio = model.clone_voice(ref_audio, text, language)
-            
-            # Calcul de la similarité
-            similarity = model.compute_similarity(ref_audio, output_audio)
-            
-            inference_time = time.time() - start_time
-            return similarity, inference_time
-            
-        except Exception as e:
-            logger.error(f"Erreur lors du test VALL-E X: {e}")
-            return 0.0, 0.0
-
-    def test_styletts2(self, reference_audio: str, text: str, language: str) -> Tuple[float, float]:
-        """Test StyleTTS2"""
-        try:
-            start_time = time.time()
-            
-            # Import des dépendances nécessaires
-            from styletts2 import StyleTTS2
+    def _load_ref(self, path: str, target_sr: int) -> torch.Tensor:
+        """Charge et rééchantillonne l'audio de référence une seule fois par fréquence"""
+        key = (path, target_sr)
+        ref_audio = self._resample_cache.get(key)
+        if ref_audio is None:
             import torchaudio
             
-            # Chargement du modèle
-            model = StyleTTS2()
-            model.load_model()
-            
-            # Chargement de l'audio de référence
-            ref_audio, sr = torchaudio.load(reference_audio)
-            if sr != 22050:
-                ref_audio = torchaudio.functional.resample(ref_audio, sr, 22050)
-            
-            # Génération de la voix clonée
-            output_audio = model.clone_voice(ref_audio, text)
-            
-            # Calcul de la similarité
-            similarity = model.compute_similarity(ref_audio, output_audio)
-            
-            inference_time = time.time() - start_time
-            return similarity, inference_time
-            
-        except Exception as e:
-            logger.error(f"Erreur lors du test StyleTTS2: {e}")
-            return 0.0, 0.0
-
-    def test_bark(self, reference_audio: str, text: str, language: str) -> Tuple[float, float]:
-        """Test Bark"""
+            ref_audio, sr = torchaudio.load(path)
+            if sr != target_sr:
+                ref_audio = torchaudio.functional.resample(ref_audio, sr, target_sr)
+            self._resample_cache[key] = ref_audio
+        return ref_audio
+        
+    def _run_model(self, spec: ModelSpec, reference_audio: str, text: str, language: str) -> Tuple[float, float]:
+        """Teste un modèle décrit par une entrée de _MODEL_SPECS"""
         try:
             start_time = time.time()
             
             # Import des dépendances nécessaires
-            from bark import Bark
-            import torchaudio
+            module = importlib.import_module(spec.module)
             
             # Chargement du modèle
-            model = Bark()
+            model = getattr(module, spec.cls)()
             model.load_model()
             
             # Chargement de l'audio de référence
-            ref_audio, sr = torchaudio.load(reference_audio)
-            if sr != 24000:
-                ref_audio = torchaudio.functional.resample(ref_audio, sr, 24000)
+            ref_audio = self._load_ref(reference_audio, spec.sample_rate)
             
             # Génération de la voix clonée
-            output_audio = model.clone_voice(ref_audio, text)
+            if spec.pass_language:
+                output_audio = model.clone_voice(ref_audio, text, language)
+            else:
+                output_audio = model.clone_voice(ref_audio, text)
             
             # Calcul de la similarité
             similarity = model.compute_similarity(ref_audio, output_audio)
@@ -141,7 +85,7 @@ class VoiceCloningTester:
             return similarity, inference_time
             
         except Exception as e:
-            logger.error(f"Erreur lors du test Bark: {e}")
+            logger.error(f"Erreur lors du test {spec.name}: {e}")
             return 0.0, 0.0
 
     def test_coqui_tts(self, reference_audio: str, text: str, language: str) -> Tuple[float, float]:
@@ -152,7 +96,6 @@ class VoiceCloningTester:
             # Import des dépendances nécessaires
             try:
                 from TTS.api import TTS
-                import torchaudio
                 logger.info("Dépendances TTS chargées avec succès")
             except ImportError as e:
                 logger.warning(f"TTS n'est pas installé ou n'est pas accessible: {e}")
@@ -168,9 +111,7 @@ class VoiceCloningTester:
             
             # Chargement de l'audio de référence
             try:
-                ref_audio, sr = torchaudio.load(reference_audio)
-                if sr != 22050:
-                    ref_audio = torchaudio.functional.resample(ref_audio, sr, 22050)
+                ref_audio = self._load_ref(reference_audio, 22050)
                 logger.info(f"Audio de référence chargé: {reference_audio}")
             except Exception as e:
                 logger.error(f"Erreur lors du chargement de l'audio de référence: {e}")
@@ -178,25 +119,25 @@ class VoiceCloningTester:
             
             # Génération de la voix clonée
             try:
-                output_audio = model.tts_to_file(
+                output_wave = model.tts(
                     text=text,
                     speaker_wav=reference_audio,
-                    language=language,
-                    file_path="temp_output.wav"
+                    language=language
                 )
                 logger.info("Génération de la voix clonée réussie")
             except Exception as e:
                 logger.error(f"Erreur lors de la génération de la voix: {e}")
                 return 0.0, 0.0
             
-            # Chargement de l'audio généré et calcul de la similarité
+            # Calcul de la similarité directement sur la forme d'onde générée
             try:
-                output_audio, _ = torchaudio.load("temp_output.wav")
-                similarity = torch.nn.functional.cosine_similarity(
-                    ref_audio.mean(dim=1),
-                    output_audio.mean(dim=1),
-                    dim=0
-                ).item()
+                output_audio = torch.as_tensor(output_wave, dtype=torch.float32).unsqueeze(0)
+                with torch.inference_mode():
+                    similarity = torch.nn.functional.cosine_similarity(
+                        ref_audio.mean(dim=1),
+                        output_audio.mean(dim=1),
+                        dim=0
+                    ).item()
                 logger.info(f"Similarité calculée: {similarity:.4f}")
             except Exception as e:
                 logger.error(f"Erreur lors du calcul de la similarité: {e}")
@@ -210,54 +151,19 @@ class VoiceCloningTester:
             logger.error(f"Erreur inattendue lors du test Coqui TTS: {e}")
             return 0.0, 0.0
 
-    def test_spark_tts(self, reference_audio: str, text: str, language: str) -> Tuple[float, float]:
-        """Test Spark-TTS"""
-        try:
-            start_time = time.time()
-            
-            # Import des dépendances nécessaires
-            from spark_tts import SparkTTS
-            import torchaudio
-            
-            # Chargement du modèle
-            model = SparkTTS()
-            model.load_model()
-            
-            # Chargement de l'audio de référence
-            ref_audio, sr = torchaudio.load(reference_audio)
-            if sr != 16000:
-                ref_audio = torchaudio.functional.resample(ref_audio, sr, 16000)
-            
-            # Génération de la voix clonée
-            output_audio = model.clone_voice(ref_audio, text, language)
-            
-            # Calcul de la similarité
-            similarity = model.compute_similarity(ref_audio, output_audio)
-            
-            inference_time = time.time() - start_time
-            return similarity, inference_time
-            
-        except Exception as e:
-            logger.error(f"Erreur lors du test Spark-TTS: {e}")
-            return 0.0, 0.0
-
     def run_comprehensive_test(self, reference_audio: str, test_texts: Dict[str, str]):
         """Exécute des tests complets sur tous les modèles"""
         logger.info("Démarrage des tests complets...")
         
-        for model_name, test_func in [
-            ("OpenVoice V2", self.test_openvoice_v2),
-            ("VALL-E X", self.test_valle_x),
-            ("StyleTTS2", self.test_styletts2),
-            ("Bark", self.test_bark),
-            ("Coqui TTS", self.test_coqui_tts),
-            ("Spark-TTS", self.test_spark_tts)
-        ]:
+        tests = [(spec.name, partial(self._run_model, spec), spec.english_only) for spec in _MODEL_SPECS]
+        tests.append(("Coqui TTS", self.test_coqui_tts, False))
+        
+        for model_name, test_func, english_only in tests:
             logger.info(f"Test de {model_name}...")
             model_results = {}
             
             for language, text in test_texts.items():
-                if model_name in ["StyleTTS2", "Bark"] and language != "en":
+                if english_only and language != "en":
                     continue
                     
                 similarity, inference_time = test_func(reference_audio, text, language)
@@ -1,9 +1,13 @@
 import os
 import torch
+from concurrent.futures import ThreadPoolExecutor
 from openvoice import se_extractor
 from openvoice.api import BaseSpeakerTTS, ToneColorConverter
 from pydub.utils import which
 
+# Disponibilité CUDA évaluée une seule fois (initialisation du pilote coûteuse)
+_HAS_CUDA = torch.cuda.is_available()
+
 # Spécifier le chemin vers ffmpeg
 os.environ["PATH"] += os.pathsep + r"C:\ffmpeg"
 if which("ffmpeg") is None:
@@ -12,7 +16,7 @@ if which("ffmpeg") is None:
 # Initialisation
 ckpt_base = 'checkpoints/base_speakers/EN'
 ckpt_converter = 'checkpoints/converter'
-device = "cuda:0" if torch.cuda.is_available() else "cpu"
+device = "cuda:0" if _HAS_CUDA else "cpu"
 output_dir = 'outputs'
 
 print(f"Using device: {device}")
@@ -21,22 +25,28 @@ print(f"ffmpeg path: {which('ffmpeg')}")
 # Création du dossier de sortie
 os.makedirs(output_dir, exist_ok=True)
 
-# Initialisation des modèles
-base_speaker_tts = BaseSpeakerTTS(
-    config_path='checkpoints/base_speakers/EN/config.json',
-    device=device,
-)
-base_speaker_tts.load_ckpt('checkpoints/base_speakers/EN/checkpoint.pth')
-
+# Initialisation du convertisseur (requis par l'extraction d'empreinte)
 tone_color_converter = ToneColorConverter(f'{ckpt_converter}/config.json', device=device)
 tone_color_converter.load_ckpt(f'{ckpt_converter}/checkpoint.pth')
 
-# Chargement de l'empreinte vocale source
-source_se = torch.load(f'{ckpt_base}/en_style_se.pth').to(device)
-
-# Extraction de l'empreinte vocale de votre fichier audio
+# Extraction de l'empreinte vocale de votre fichier audio, en parallèle
+# du chargement du modèle de base (décodage mp3 + VAD indépendants)
 reference_speaker = 'resources/reference_voice.mp3'
-target_se, audio_name = se_extractor.get_se(reference_speaker, tone_color_converter, target_dir='processed', vad=True)
+with ThreadPoolExecutor(max_workers=1) as executor:
+    se_future = executor.submit(se_extractor.get_se, reference_speaker, tone_color_converter,
+                                target_dir='processed', vad=True)
+
+    # Initialisation du modèle de base
+    base_speaker_tts = BaseSpeakerTTS(
+        config_path='checkpoints/base_speakers/EN/config.json',
+        device=device,
+    )
+    base_speaker_tts.load_ckpt('checkpoints/base_speakers/EN/checkpoint.pth')
+
+    # Chargement de l'empreinte vocale source
+    source_se = torch.load(f'{ckpt_base}/en_style_se.pth', map_location=device, weights_only=True)
+
+    target_se, audio_name = se_future.result()
 
 # Texte à générer avec phonétisation pour améliorer la prononciation française
 text = "Bohn-JOOR, juh swee FLOH-bee-DOO, votr ah-see-stahn AI pray-fay-RAY"
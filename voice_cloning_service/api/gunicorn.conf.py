@@ -0,0 +1,57 @@
+"""
+Configuration gunicorn pour le service de clonage vocal.
+
+Usage:
+    gunicorn -c voice_cloning_service/api/gunicorn.conf.py voice_cloning_service.api.main:app
+"""
+
+import itertools
+import os
+
+from uvicorn_worker import UvicornWorker
+
+
+class LimitedUvicornWorker(UvicornWorker):
+    """
+    Worker uvicorn avec les mêmes limites que le serveur de développement
+    
+    UvicornWorker ne transmet pas worker_connections à uvicorn : la limite
+    de concurrence doit être fournie via CONFIG_KWARGS.
+    """
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        # Refuser rapidement la surcharge (503) plutôt que d'accumuler les connexions
+        "limit_concurrency": 32,
+        # Pas de journal d'accès ni d'en-têtes Server/Date sur le chemin critique
+        "access_log": False,
+        "server_header": False,
+        "date_header": False,
+    }
+
+
+# Adresse d'écoute
+bind = os.environ.get("VOICE_CLONING_BIND", "0.0.0.0:8000")
+
+# Un worker par GPU : chaque worker possède son pool d'inférence et son modèle
+worker_class = LimitedUvicornWorker
+workers = int(os.environ.get("VOICE_CLONING_WORKERS", 1))
+
+# Pas de threads : uvicorn exécute déjà les endpoints synchrones dans un pool
+keepalive = 5
+
+# File d'attente des connexions en attente d'acceptation
+backlog = 64
+
+# Le clonage vocal peut dépasser le délai par défaut de 30 s
+timeout = 120
+
+
+def pre_fork(server, worker):
+    """Attribue au worker le plus petit rang libre (réutilisé après un redémarrage)"""
+    used = {getattr(w, "rank", None) for w in server.WORKERS.values()}
+    worker.rank = next(rank for rank in itertools.count() if rank not in used)
+
+
+def post_fork(server, worker):
+    """Expose le rang du worker à l'application, qui en déduit son GPU"""
+    os.environ["VOICE_CLONING_WORKER_RANK"] = str(worker.rank)
@@ -1,46 +1,372 @@
-from fastapi import FastAPI, UploadFile, File
+"""
+API du service de clonage vocal.
+
+En production, lancer un worker uvicorn par GPU via gunicorn:
+    VOICE_CLONING_WORKERS=<nombre de GPU> gunicorn -c voice_cloning_service/api/gunicorn.conf.py \
+        voice_cloning_service.api.main:app
+
+Chaque worker reçoit un rang (VOICE_CLONING_WORKER_RANK) qui détermine son GPU.
+
+L'exécution directe de ce fichier démarre un serveur unique pour le développement.
+
+Les origines autorisées pour CORS sont lues dans CORS_ORIGINS (liste séparée
+par des virgules); sans cette variable, aucune origine externe n'est autorisée.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, ConfigDict
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Route
 import uvicorn
-from typing import Optional
+from typing import Optional, Tuple
+
+# Boucle d'événements et parseur HTTP natifs (uvicorn[standard]) si disponibles
+try:
+    import uvloop  # noqa: F401
+    _UVICORN_LOOP = "uvloop"
+except ImportError:
+    _UVICORN_LOOP = "asyncio"
+
+try:
+    import httptools  # noqa: F401
+    _UVICORN_HTTP = "httptools"
+except ImportError:
+    _UVICORN_HTTP = "h11"
+
+# Configuration du logger
+logger = logging.getLogger(__name__)
+
+# orjson est optionnel : repli sur le module json standard
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """Réponse JSON sérialisée par orjson lorsqu'il est disponible"""
+    
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return super().render(content)
+
+
+# Nombre de processus d'inférence par worker (tous sur le GPU du worker)
+_INFER_WORKERS = int(os.environ.get("VOICE_CLONING_INFER_WORKERS", 1))
+
+# Dossier des checkpoints du convertisseur de timbre OpenVoice
+_CKPT_CONVERTER = os.environ.get("VOICE_CLONING_CKPT_CONVERTER", "checkpoints/converter")
+
+# Convertisseur chargé une seule fois dans chaque processus d'inférence
+_converter = None
+
+
+def _init_infer_worker(worker_rank: int):
+    """
+    Charge le modèle OpenVoice au démarrage d'un processus d'inférence
+    
+    Args:
+        worker_rank (int): Rang du worker serveur propriétaire du pool (choix du GPU)
+    """
+    global _converter
+    try:
+        import torch
+        from openvoice.api import ToneColorConverter
+        
+        if torch.cuda.is_available():
+            device = f"cuda:{worker_rank % torch.cuda.device_count()}"
+        else:
+            device = "cpu"
+            
+        converter = ToneColorConverter(os.path.join(_CKPT_CONVERTER, "config.json"), device=device)
+        converter.load_ckpt(os.path.join(_CKPT_CONVERTER, "checkpoint.pth"))
+        _converter = converter
+        logger.info(f"✅ Modèle OpenVoice chargé sur {device}")
+        
+    except Exception as e:
+        logger.warning(f"⚠️ Modèle OpenVoice non préchargé: {e}")
+
+
+def _worker_ready() -> bool:
+    """Tâche vide forçant le démarrage d'un processus d'inférence (et son préchargement)"""
+    return _converter is not None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Crée les ressources d'inférence propres à chaque worker
+    """
+    # Rang attribué par gunicorn (post_fork); 0 pour le serveur de développement
+    worker_rank = int(os.environ.get("VOICE_CLONING_WORKER_RANK", 0))
+    
+    # Processus dédiés : le calcul ne bloque pas la boucle d'événements
+    app.state.pool = ProcessPoolExecutor(
+        max_workers=_INFER_WORKERS,
+        initializer=_init_infer_worker,
+        initargs=(worker_rank,)
+    )
+    # Borne le nombre de clonages soumis au pool
+    app.state.infer_slots = asyncio.Semaphore(_INFER_WORKERS * 2)
+    try:
+        # Démarrer les processus et charger les modèles avant la première requête
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(app.state.pool, _worker_ready)
+            for _ in range(_INFER_WORKERS)
+        ))
+        yield
+    finally:
+        app.state.pool.shutdown()
+
 
 app = FastAPI(
     title="Voice Cloning Service",
     description="API pour le clonage vocal utilisant OpenVoice",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
+)
+
+# Origines autorisées (ensemble : test d'appartenance en O(1))
+_CORS_ORIGINS = frozenset(
+    origin.strip() for origin in os.environ.get("CORS_ORIGINS", "").split(",") if origin.strip()
 )
 
+
+class FastCORSMiddleware(CORSMiddleware):
+    """CORSMiddleware ignorant les chemins internes (sondes de santé)"""
+    
+    def __init__(self, app, bypass_paths=frozenset(), **kwargs):
+        super().__init__(app, **kwargs)
+        self.bypass_paths = bypass_paths
+        
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.bypass_paths:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
 # Configuration CORS
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
+    FastCORSMiddleware,
+    bypass_paths=frozenset(("/health",)),
+    allow_origins=_CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+# Taille des blocs lus depuis le fichier téléversé (1 Mio)
+_UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Nombre maximal de réponses gardées en cache
+_CACHE_MAX_ENTRIES = int(os.environ.get("VOICE_CLONING_CACHE_SIZE", 256))
+
+
+class ResponseCache:
+    """Cache LRU des résultats de clonage, indexé par (empreinte audio, texte, langue, style)"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        
+    def get(self, key):
+        """Retourne le résultat mis en cache ou None"""
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+        
+    def put(self, key, result):
+        """Mémorise un résultat en évinçant le moins récemment utilisé"""
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            
+    def stats(self) -> dict:
+        """Statistiques d'utilisation du cache"""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+_response_cache = ResponseCache(_CACHE_MAX_ENTRIES)
+
+
 class VoiceCloneRequest(BaseModel):
+    # Validation pydantic-core : champs inconnus refusés, instance immuable
+    model_config = ConfigDict(extra="forbid", frozen=True, str_strip_whitespace=False)
+    
     text: str
     language: str
     style: Optional[str] = None
 
+def _copy_upload(src, fd: int) -> str:
+    """
+    Copie le contenu téléversé dans le descripteur fd en calculant son empreinte
+    
+    Returns:
+        str: Empreinte SHA-256 du contenu
+    """
+    digest = hashlib.sha256()
+    src.seek(0)
+    with os.fdopen(fd, "wb") as dst:
+        while chunk := src.read(_UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            dst.write(chunk)
+    return digest.hexdigest()
+
+
+async def _spool_upload(upload: UploadFile) -> Tuple[str, str]:
+    """
+    Copie le fichier téléversé sur disque par blocs, sans le charger en mémoire
+    
+    Returns:
+        tuple: (chemin du fichier temporaire à supprimer par l'appelant,
+                empreinte SHA-256 du contenu)
+    """
+    suffix = os.path.splitext(upload.filename or "")[1]
+    fd, path = tempfile.mkstemp(prefix="voice_clone_", suffix=suffix)
+    try:
+        # Une seule tâche dans le pool de threads pour toute la copie,
+        # plutôt qu'un aller-retour lecture + écriture par bloc
+        digest = await run_in_threadpool(_copy_upload, upload.file, fd)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, digest
+
+
+def _run_clone(audio_path: str, text: Optional[str], language: Optional[str], style: Optional[str]) -> dict:
+    """
+    Clone la voix de l'audio de référence (exécuté dans un processus d'inférence)
+    """
+    # TODO: Implémenter la logique de clonage vocal avec _converter (préchargé)
+    return {"message": "Service en cours de développement"}
+
+
 @app.post("/clone-voice")
 async def clone_voice(
+    http_request: Request,
     audio_file: UploadFile = File(...),
     request: VoiceCloneRequest = None
 ):
     """
     Endpoint pour cloner une voix à partir d'un fichier audio
     """
-    # TODO: Implémenter la logique de clonage vocal
-    return {"message": "Service en cours de développement"}
+    text = request.text if request else None
+    language = request.language if request else None
+    style = request.style if request else None
+    
+    audio_path, audio_digest = await _spool_upload(audio_file)
+    try:
+        # Même voix, même texte : réutiliser le résultat précédent
+        cache_key = (audio_digest, text, language, style)
+        result = _response_cache.get(cache_key)
+        if result is None:
+            state = http_request.app.state
+            loop = asyncio.get_running_loop()
+            async with state.infer_slots:
+                result = await loop.run_in_executor(
+                    state.pool, _run_clone, audio_path, text, language, style
+                )
+            _response_cache.put(cache_key, result)
+    finally:
+        os.unlink(audio_path)
+        
+    return FastJSONResponse(result)
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """
+    Endpoint exposant les statistiques du cache de réponses
+    """
+    return FastJSONResponse(_response_cache.stats())
+
+# Réponse de /health sérialisée une seule fois
+_HEALTH_BODY = FastJSONResponse({"status": "healthy"}).body
 
-@app.get("/health")
-async def health_check():
+# Schéma OpenAPI sérialisé au premier accès
+_openapi_body = None
+
+
+class StaticJSONEndpoint:
+    """
+    Application ASGI brute renvoyant un corps JSON fixe
+    
+    Utilisée pour les sondes de santé : pas de routage FastAPI, de résolution
+    de dépendances ni de sérialisation par requête.
+    """
+    
+    def __init__(self, body: bytes):
+        self._start = {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+            ],
+        }
+        self._body = {"type": "http.response.body", "body": body}
+        
+    async def __call__(self, scope, receive, send):
+        await send(self._start)
+        await send(self._body)
+
+
+async def _openapi_json(request: Request) -> Response:
     """
-    Endpoint pour vérifier l'état du service
+    Sert le schéma OpenAPI sans le resérialiser à chaque requête
     """
-    return {"status": "healthy"}
+    global _openapi_body
+    if _openapi_body is None:
+        _openapi_body = FastJSONResponse(app.openapi()).body
+    return Response(content=_openapi_body, media_type="application/json")
+
+
+# Routes servies hors de la pile FastAPI, prioritaires sur les routes déclarées
+app.router.routes.insert(0, Route("/health", StaticJSONEndpoint(_HEALTH_BODY), methods=["GET"]))
+app.router.routes.insert(1, Route(app.openapi_url, _openapi_json, include_in_schema=False))
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    # Serveur de développement (processus unique)
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop=_UVICORN_LOOP,
+        http=_UVICORN_HTTP,
+        log_level="warning",
+        # Refuser rapidement la surcharge plutôt que d'accumuler les connexions
+        limit_concurrency=32,
+        backlog=64,
+        timeout_keep_alive=5,
+        # Pas de journal d'accès ni d'en-têtes Server/Date sur le chemin critique
+        access_log=False,
+        server_header=False,
+        date_header=False
+    ) 
\ No newline at end of file